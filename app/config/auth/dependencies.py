@@ -7,11 +7,14 @@ from app.utils.methods import (
 )
 from app.utils.messages import INVALID_TOKEN, USER_FOUND
 from .token import verify_token
+from .user_loader import begin_request_scope
 
 security = HTTPBearer()
 
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    # Async so the user memo below is scoped to the request's own context
+    begin_request_scope()
     token = credentials.credentials
     result = verify_token(token)
     if not isinstance(result, tuple):
@@ -25,7 +28,10 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
 
 
 def get_current_user_ws(token: str):
-    device_id, user_id = verify_token(token)
+    result = verify_token(token)
+    if not isinstance(result, tuple):
+        return result
+    device_id, user_id = result
     if not device_id:
         return create_exception_response(status.HTTP_401_UNAUTHORIZED, INVALID_TOKEN)
     return create_success_response(
@@ -1,13 +1,34 @@
-from datetime import datetime, timedelta
+import hashlib
+import heapq
+import logging
+import time
+from datetime import datetime, timedelta, timezone
 from typing import Optional
+from cachetools import LRUCache
 from jose import JWTError, jwt
-from jwt import ExpiredSignatureError
+from jose.exceptions import ExpiredSignatureError
+from app.config.database.mongo import revoked_tokens_collection
+from app.utils.cache_manager import cache_manager
 from app.utils.messages import INVALID_TOKEN_NO_SUBJECT
 from app.utils.methods import create_exception_response
 
+logger = logging.getLogger("uvicorn")
+
 SECRET_KEY = "your_super_secret_key"
 ALGORITHM = "HS256"
 
+# Channel on which revoked token digests are broadcast to every worker
+REVOCATION_CHANNEL = "auth.revoke"
+
+# digest -> (exp, (device_id, user_id)) of tokens whose signature was already checked
+_verified_tokens = LRUCache(maxsize=10000)
+
+# digest -> exp of logged out tokens; entries are dropped once the token expires anyway
+_revoked_tokens = {}
+# (exp, digest) of every revocation, soonest expiry first, so pruning only
+# touches the expired ones
+_revocation_expiries = []
+
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -17,15 +38,86 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
+def _token_digest(token: str) -> str:
+    return hashlib.blake2b(token.encode(), digest_size=16).hexdigest()
+
+
 def verify_token(token: str):
+    digest = _token_digest(token)
+    if digest in _revoked_tokens:
+        return create_exception_response(401, "Token has been revoked")
+
+    # Tokens seen before skip the signature check until they expire
+    cached = _verified_tokens.get(digest)
+    if cached is not None:
+        expires_at, claims = cached
+        if expires_at > time.time():
+            return claims
+        _verified_tokens.pop(digest, None)
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         device_id: str = payload.get("sub")
         user_id: str = payload.get("user_id")
         if device_id is None:
             return create_exception_response(400, INVALID_TOKEN_NO_SUBJECT)
+        if payload.get("exp"):
+            _verified_tokens[digest] = (payload["exp"], (device_id, user_id))
         return device_id, user_id
     except ExpiredSignatureError:
         return create_exception_response(401, "Token has expired")
     except JWTError:
         return create_exception_response(401, "Invalid token")
+
+
+def _add_revocation(digest: str, expires_at: float):
+    now = time.time()
+    while _revocation_expiries and _revocation_expiries[0][0] <= now:
+        expired_at, expired = heapq.heappop(_revocation_expiries)
+        # The same token may have been revoked again since (other worker, reload)
+        if _revoked_tokens.get(expired) == expired_at:
+            del _revoked_tokens[expired]
+    if _revoked_tokens.get(digest) != expires_at:
+        _revoked_tokens[digest] = expires_at
+        heapq.heappush(_revocation_expiries, (expires_at, digest))
+    _verified_tokens.pop(digest, None)
+
+
+async def revoke_token(token: str):
+    """
+    Reject `token` from now on, in every worker. The revocation is persisted
+    until the token would have expired, so restarts keep honouring it.
+    """
+    if not token:
+        return
+    try:
+        expires_at = float(jwt.get_unverified_claims(token).get("exp") or 0)
+    except JWTError:
+        return
+    if expires_at <= time.time():
+        return
+
+    digest = _token_digest(token)
+    _add_revocation(digest, expires_at)
+    await revoked_tokens_collection.update_one(
+        {"_id": digest},
+        {"$set": {"expires_at": datetime.fromtimestamp(expires_at, tz=timezone.utc)}},
+        upsert=True,
+    )
+    await cache_manager.backend.publish(REVOCATION_CHANNEL, (digest, expires_at))
+
+
+def _apply_revocation(message):
+    digest, expires_at = message
+    _add_revocation(digest, expires_at)
+
+
+async def start_token_revocation_sync():
+    """Load persisted revocations and follow the ones issued by other workers."""
+    await cache_manager.backend.subscribe(REVOCATION_CHANNEL, _apply_revocation)
+    async for revoked in revoked_tokens_collection.find(
+        {"expires_at": {"$gt": datetime.now(timezone.utc)}}
+    ):
+        expires_at = revoked["expires_at"].replace(tzinfo=timezone.utc)
+        _add_revocation(revoked["_id"], expires_at.timestamp())
+    logger.info(f"🔐 {len(_revoked_tokens)} revoked tokens loaded")
@@ -0,0 +1,81 @@
+"""
+Request-scoped user loader for the signed-in user and other full accounts
+(ACCOUNT projection).
+
+`get_current_user` opens a scope for every authenticated request. Inside it each
+user document is read from Mongo at most once, and concurrent lookups of the
+same user share one query. Documents reflect the first read of the request.
+
+`settings.user_cache_ttl` (seconds, 0 = off) additionally keeps hot users in a
+process cache across requests; entries are dropped whenever the user's
+"profile:<user_id>" cache tag is invalidated, in every worker.
+"""
+import asyncio
+import copy
+from contextvars import ContextVar
+from typing import Optional
+from cachetools import TTLCache
+from app.config.database.mongo import users_collection
+from app.config.database.projections import ACCOUNT
+from app.utils.cache_manager import cache_manager
+from app.utils.settings import settings
+
+_request_users: ContextVar[Optional[dict]] = ContextVar("request_users", default=None)
+
+_user_cache = (
+    TTLCache(maxsize=10000, ttl=settings.user_cache_ttl)
+    if settings.user_cache_ttl > 0
+    else None
+)
+
+
+def begin_request_scope():
+    """Start an empty user memo for the current request."""
+    _request_users.set({})
+
+
+async def _fetch_user(user_id: str):
+    if _user_cache is not None:
+        user = _user_cache.get(user_id)
+        if user is not None:
+            return copy.deepcopy(user)
+    user = await users_collection.find_one({"user_id": user_id}, ACCOUNT)
+    if user and _user_cache is not None:
+        _user_cache[user_id] = copy.deepcopy(user)
+    return user
+
+
+async def load_user(user_id: str):
+    """Return the user document for `user_id` (or None), memoized per request."""
+    scope = _request_users.get()
+    if scope is None:
+        return await _fetch_user(user_id)
+
+    task = scope.get(user_id)
+    if task is None:
+        task = asyncio.ensure_future(_fetch_user(user_id))
+        scope[user_id] = task
+    try:
+        # Shielded so one cancelled caller doesn't fail the others sharing the read
+        return await asyncio.shield(task)
+    except Exception:
+        scope.pop(user_id, None)
+        raise
+
+
+def forget_user(user_id: str):
+    """Drop `user_id` from the request memo and the process cache."""
+    scope = _request_users.get()
+    if scope is not None:
+        scope.pop(user_id, None)
+    if _user_cache is not None:
+        _user_cache.pop(user_id, None)
+
+
+@cache_manager.on_invalidate
+def _forget_invalidated_users(tags: list):
+    if _user_cache is None:
+        return
+    for tag in tags:
+        if tag.startswith("profile:"):
+            _user_cache.pop(tag.split(":", 1)[1], None)
@@ -0,0 +1,237 @@
+"""
+Cache backends shared by CacheManager and cached_mongo_call.
+
+- LocalCacheBackend   per-process store, the default and what tests run against
+- SocketCacheBackend  client of the cache daemon (cache_server.py), one store for every worker
+
+Both carry a small pub/sub so invalidations can be broadcast to every worker:
+
+    python -m app.config.cache.cache_server --socket /tmp/inkly-cache.sock
+    CACHE_BACKEND=socket CACHE_SOCKET_PATH=/tmp/inkly-cache.sock uvicorn main:app --workers 4
+"""
+import asyncio
+import inspect
+import logging
+import pickle
+import struct
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Union
+from cachetools import TLRUCache
+from app.utils.settings import settings
+
+logger = logging.getLogger("uvicorn")
+
+Handler = Callable[[Any], Union[None, Awaitable[None]]]
+
+# Returned by `get` on a miss, so falsy values can be cached
+MISSING = object()
+
+
+class CacheBackend(ABC):
+    @abstractmethod
+    async def get(self, key: str):
+        """Return the cached value for `key`, or MISSING."""
+
+    @abstractmethod
+    async def set(self, key: str, value, ttl: int, tags: Iterable[str] = ()):
+        """Store `value` for `ttl` seconds and index it under `tags`."""
+
+    @abstractmethod
+    async def invalidate(self, tags: Iterable[str]):
+        """Drop every entry indexed under any of `tags`."""
+
+    @abstractmethod
+    async def publish(self, channel: str, message) -> bool:
+        """
+        Deliver `message` to every subscriber of `channel`, in every worker.
+        Returns False when it could not be handed over for delivery.
+        """
+
+    @abstractmethod
+    async def subscribe(self, channel: str, handler: Handler):
+        """Call `handler(message)` for every message published on `channel`."""
+
+    async def close(self):
+        pass
+
+
+async def _dispatch(handler: Handler, message):
+    try:
+        result = handler(message)
+        if inspect.isawaitable(result):
+            await result
+    except Exception as e:
+        logger.error(f"❌ Cache subscriber failed: {e}")
+
+
+class LocalCacheBackend(CacheBackend):
+    def __init__(self, maxsize: int = 1000):
+        self._maxsize = maxsize
+        # Entries are (ttl, value) so each one expires after its own ttl
+        self._cache = TLRUCache(maxsize=maxsize, ttu=lambda _key, entry, now: now + entry[0])
+        self._tag_to_keys: Dict[str, set] = {}
+        self._subscribers: Dict[str, list] = defaultdict(list)
+
+    def _prune_tags(self):
+        # Entries expire or get evicted silently, drop the tag references they left behind
+        for tag in list(self._tag_to_keys):
+            keys = {key for key in self._tag_to_keys[tag] if key in self._cache}
+            if keys:
+                self._tag_to_keys[tag] = keys
+            else:
+                del self._tag_to_keys[tag]
+
+    async def get(self, key: str):
+        entry = self._cache.get(key)
+        return MISSING if entry is None else entry[1]
+
+    async def set(self, key: str, value, ttl: int, tags: Iterable[str] = ()):
+        self._cache[key] = (ttl, value)
+        for tag in tags:
+            self._tag_to_keys.setdefault(tag, set()).add(key)
+        if len(self._tag_to_keys) > self._maxsize * 10:
+            self._prune_tags()
+
+    async def invalidate(self, tags: Iterable[str]):
+        for tag in tags:
+            for key in self._tag_to_keys.pop(tag, ()):
+                self._cache.pop(key, None)
+
+    async def publish(self, channel: str, message) -> bool:
+        for handler in list(self._subscribers[channel]):
+            await _dispatch(handler, message)
+        return True
+
+    async def subscribe(self, channel: str, handler: Handler):
+        self._subscribers[channel].append(handler)
+
+
+# ---------------- Wire protocol ---------------- #
+# Frames are a 4 byte big-endian length followed by a pickled tuple. The socket
+# is only reachable by the app's own user (see cache_server.py).
+
+_HEADER = struct.Struct("!I")
+
+
+async def read_frame(reader: asyncio.StreamReader):
+    header = await reader.readexactly(_HEADER.size)
+    (length,) = _HEADER.unpack(header)
+    return pickle.loads(await reader.readexactly(length))
+
+
+def write_frame(writer: asyncio.StreamWriter, message):
+    payload = pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
+    writer.write(_HEADER.pack(len(payload)) + payload)
+
+
+class SocketCacheBackend(CacheBackend):
+    """
+    Client of the cache daemon. Requests are pipelined over one connection and
+    matched to their replies by id. When the daemon is unreachable every call
+    degrades to a cache miss, so the app keeps serving from Mongo.
+    """
+
+    def __init__(self, socket_path: str, timeout: float = 1.0, retry_after: float = 1.0):
+        self._socket_path = socket_path
+        self._timeout = timeout
+        self._retry_after = retry_after
+        self._retry_at = 0.0
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._connect_lock = asyncio.Lock()
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._next_id = 0
+        self._subscribers: Dict[str, list] = defaultdict(list)
+
+    async def _connect(self):
+        async with self._connect_lock:
+            if self._writer is not None and not self._writer.is_closing():
+                return
+            reader, self._writer = await asyncio.open_unix_connection(self._socket_path)
+            self._reader_task = asyncio.create_task(self._read_loop(reader, self._writer))
+            # Subscriptions live on the connection, restore them after a reconnect
+            for channel in self._subscribers:
+                write_frame(self._writer, (0, "subscribe", (channel,)))
+            await self._writer.drain()
+
+    async def _read_loop(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_id, payload = await read_frame(reader)
+                if request_id == 0:
+                    channel, message = payload
+                    for handler in list(self._subscribers.get(channel, ())):
+                        asyncio.create_task(_dispatch(handler, message))
+                    continue
+                future = self._pending.pop(request_id, None)
+                if future is not None and not future.done():
+                    future.set_result(payload)
+        except (asyncio.IncompleteReadError, ConnectionError, OSError) as e:
+            logger.warning(f"⚠️ Cache daemon connection lost: {e}")
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("cache daemon connection lost"))
+            self._pending.clear()
+            writer.close()
+            if self._writer is writer:
+                self._writer = None
+
+    async def _call(self, op: str, *args, default=None):
+        if time.monotonic() < self._retry_at:
+            return default
+        self._next_id += 1
+        request_id = self._next_id
+        try:
+            await self._connect()
+            future = asyncio.get_running_loop().create_future()
+            self._pending[request_id] = future
+            write_frame(self._writer, (request_id, op, args))
+            await self._writer.drain()
+            return await asyncio.wait_for(future, self._timeout)
+        except (asyncio.TimeoutError, ConnectionError, OSError) as e:
+            logger.warning(f"⚠️ Cache daemon {op} failed: {e}")
+            self._retry_at = time.monotonic() + self._retry_after
+            return default
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def get(self, key: str):
+        found, value = await self._call("get", key, default=(False, None))
+        return value if found else MISSING
+
+    async def set(self, key: str, value, ttl: int, tags: Iterable[str] = ()):
+        await self._call("set", key, value, ttl, list(tags))
+
+    async def invalidate(self, tags: Iterable[str]):
+        await self._call("invalidate", list(tags))
+
+    async def publish(self, channel: str, message) -> bool:
+        return await self._call("publish", channel, message, default=False) is not False
+
+    async def subscribe(self, channel: str, handler: Handler):
+        first = channel not in self._subscribers
+        self._subscribers[channel].append(handler)
+        if first:
+            await self._call("subscribe", channel)
+
+    async def close(self):
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+def create_cache_backend(
+    backend: str = None, socket_path: str = None, maxsize: int = 1000
+) -> CacheBackend:
+    """Build the backend selected by `settings.cache_backend` ("local" or "socket")."""
+    backend = backend or settings.cache_backend
+    if backend == "socket":
+        return SocketCacheBackend(socket_path or settings.cache_socket_path)
+    if backend != "local":
+        raise ValueError(f"Unknown cache backend: {backend}")
+    return LocalCacheBackend(maxsize=maxsize)
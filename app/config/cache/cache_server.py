@@ -0,0 +1,106 @@
+"""
+Cache daemon shared by every uvicorn worker of a host.
+
+Holds one LocalCacheBackend behind a Unix socket and relays pub/sub messages
+between the connected workers. Run it next to the app with:
+
+    python -m app.config.cache.cache_server [--socket /tmp/inkly-cache.sock] [--maxsize 100000]
+"""
+import argparse
+import asyncio
+import logging
+import os
+from collections import defaultdict
+from app.config.cache.backend import MISSING, LocalCacheBackend, read_frame, write_frame
+
+logger = logging.getLogger("uvicorn")
+
+# How long a subscriber may take to accept a published message before it is
+# dropped. Kept under the client's request timeout, which the publisher waits on.
+PUBLISH_DRAIN_TIMEOUT = 0.5
+
+
+class CacheServer:
+    def __init__(self, maxsize: int = 100000):
+        self._store = LocalCacheBackend(maxsize=maxsize)
+        self._subscribers = defaultdict(set)
+
+    async def _handle(self, writer: asyncio.StreamWriter, op: str, args: tuple):
+        if op == "get":
+            value = await self._store.get(*args)
+            return (False, None) if value is MISSING else (True, value)
+        if op == "set":
+            return await self._store.set(*args)
+        if op == "invalidate":
+            return await self._store.invalidate(*args)
+        if op == "subscribe":
+            self._subscribers[args[0]].add(writer)
+            return None
+        if op == "publish":
+            channel, message = args
+            subscribers = []
+            for subscriber in list(self._subscribers[channel]):
+                if subscriber.is_closing():
+                    self._subscribers[channel].discard(subscriber)
+                    continue
+                write_frame(subscriber, (0, (channel, message)))
+                subscribers.append(subscriber)
+            await asyncio.gather(*(self._drain(subscriber) for subscriber in subscribers))
+            return None
+        raise ValueError(f"Unknown cache op: {op}")
+
+    async def _drain(self, subscriber: asyncio.StreamWriter):
+        try:
+            await asyncio.wait_for(subscriber.drain(), PUBLISH_DRAIN_TIMEOUT)
+        except (asyncio.TimeoutError, ConnectionError) as e:
+            # A worker that stopped reading would buffer every message in here
+            logger.warning(f"⚠️ Dropping stalled cache subscriber: {e!r}")
+            for subscribers in self._subscribers.values():
+                subscribers.discard(subscriber)
+            subscriber.close()
+
+    async def serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_id, op, args = await read_frame(reader)
+                try:
+                    result = await self._handle(writer, op, args)
+                except Exception as e:
+                    logger.error(f"❌ Cache op {op} failed: {e}")
+                    result = None
+                # Frames with id 0 are fire-and-forget
+                if request_id:
+                    write_frame(writer, (request_id, result))
+                    await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            for subscribers in self._subscribers.values():
+                subscribers.discard(writer)
+            writer.close()
+
+
+async def serve(socket_path: str, maxsize: int):
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    server = CacheServer(maxsize=maxsize)
+    # The protocol is pickle based, only the app's own user may connect
+    old_umask = os.umask(0o177)
+    try:
+        unix_server = await asyncio.start_unix_server(server.serve_client, path=socket_path)
+    finally:
+        os.umask(old_umask)
+    logger.info(f"🗄️ Cache daemon listening on {socket_path}")
+    async with unix_server:
+        await unix_server.serve_forever()
+
+
+if __name__ == "__main__":
+    from app.utils.settings import settings
+
+    parser = argparse.ArgumentParser(description="Inkly shared cache daemon")
+    parser.add_argument("--socket", default=settings.cache_socket_path)
+    parser.add_argument("--maxsize", type=int, default=100000)
+    options = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(serve(options.socket, options.maxsize))
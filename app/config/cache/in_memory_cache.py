@@ -1,53 +1,67 @@
-import asyncio
-from datetime import datetime, timedelta
+import hashlib
+from app.config.cache.backend import MISSING
+from app.utils.cache_manager import cache_manager
 
-_mongo_cache = {}
-CACHE_TTL = timedelta(minutes=5)
-_cache_lock = asyncio.Lock()
+CACHE_TTL = 300  # seconds
+
+
+def _filter_digest(filter: dict) -> str:
+    return hashlib.blake2b(repr(sorted(filter.items())).encode(), digest_size=16).hexdigest()
+
+
+def _cache_tags(collection=None, method: str = None, filter: dict = None) -> list:
+    """
+    Entries are tagged "mongo", "mongo:<collection>", "mongo:<collection>:<filter>"
+    and "mongo:<collection>:<method>:<filter>" so each invalidation scope is one tag.
+    """
+    if collection is None:
+        return ["mongo"]
+    if filter is None:
+        return [f"mongo:{collection.name}"]
+    digest = _filter_digest(filter)
+    if method is None:
+        return [f"mongo:{collection.name}:{digest}"]
+    return [f"mongo:{collection.name}:{method}:{digest}"]
 
 
 async def cached_mongo_call(collection, method: str, filter: dict):
     """
     Generic cached version for MongoDB operations like find_one and count_documents.
+    Entries live in the cache_manager backend, so they are shared across workers
+    when the cache daemon is in use.
     """
-    key = (collection.name, method, frozenset(filter.items()))
+    digest = _filter_digest(filter)
+    key = f"mongo:{collection.name}:{method}:{digest}"
 
-    async with _cache_lock:
-        cached = _mongo_cache.get(key)
-        if cached and cached[1] > datetime.utcnow():
-            return cached[0]
+    cached = await cache_manager.backend.get(key)
+    if cached is not MISSING:
+        return cached
 
     # call the actual collection method
     func = getattr(collection, method)
     result = await func(filter)
 
     # store in cache
-    async with _cache_lock:
-        _mongo_cache[key] = (result, datetime.utcnow() + CACHE_TTL)
+    tags = [
+        "mongo",
+        f"mongo:{collection.name}",
+        f"mongo:{collection.name}:{digest}",
+        key,
+    ]
+    await cache_manager.backend.set(key, result, CACHE_TTL, tags)
 
     return result
 
 
 async def invalidate_cache(filter: dict = None, collection=None, method: str = None):
     """
-    Invalidate cache entries.
+    Invalidate cache entries, in every worker.
     - If filter + method + collection are given → invalidate specific entry.
+    - If filter + collection are given → invalidate every method for this filter.
     - If only collection is given → invalidate all cache for this collection.
     - If nothing given → invalidate everything.
     """
-    async with _cache_lock:
-        keys_to_remove = []
-        for key in _mongo_cache:
-            coll_name, key_method, key_filter = key
-            if collection and coll_name != collection.name:
-                continue
-            if method and key_method != method:
-                continue
-            if filter and frozenset(filter.items()) != key_filter:
-                continue
-            keys_to_remove.append(key)
-        for key in keys_to_remove:
-            _mongo_cache.pop(key, None)
+    await cache_manager.invalidate(_cache_tags(collection, method, filter))
 
 
 # ------------------------------
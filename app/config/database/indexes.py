@@ -0,0 +1,214 @@
+"""
+Declarative index registry.
+
+Every index below is derived from a query shape issued by the services, so
+adding a new query means adding its index here. Indexes are built at startup
+(see main.py) or on demand with:
+
+    python -m app.config.database.indexes          # build indexes
+    python -m app.config.database.indexes --check  # build + report collection scans
+"""
+import asyncio
+import logging
+import sys
+from datetime import datetime, timezone
+from app.config.database.mongo import (
+    users_collection,
+    user_devices_collection,
+    posts_collection,
+    posts_hearts_collection,
+    posts_views_collection,
+    posts_comments_collection,
+    posts_bookmarks_collection,
+    users_connections_collection,
+    users_feeds_collection,
+    users_feed_heads_collection,
+    points_collection,
+    user_notifications_collection,
+    content_configs_collection,
+    user_sessions_collection,
+    revoked_tokens_collection,
+)
+
+logger = logging.getLogger("uvicorn")
+
+# (collection, keys, options)
+INDEXES = [
+    # ---------------- Users ----------------
+    (users_collection, [("user_id", 1)], {"unique": True}),
+    (users_collection, [("email", 1)], {}),
+    # Legacy device arrays, read until migrate_device_sessions has run
+    (users_collection, [("devices.device_id", 1)], {}),
+    # fetch_users_service: full-text search on people
+    (
+        users_collection,
+        [("username", "text"), ("name", "text"), ("email", "text")],
+        {
+            "name": "users_text_search",
+            "weights": {"username": 5, "name": 3, "email": 1},
+            "default_language": "none",
+        },
+    ),
+    (user_devices_collection, [("device_id", 1)], {"unique": True}),
+    # ---------------- Sessions ----------------
+    (user_sessions_collection, [("user_id", 1), ("device_id", 1)], {"unique": True}),
+    (user_sessions_collection, [("device_id", 1)], {}),
+    (user_sessions_collection, [("expires_at", 1)], {"expireAfterSeconds": 0}),
+    # Revocations are only needed until the token would have expired
+    (revoked_tokens_collection, [("expires_at", 1)], {"expireAfterSeconds": 0}),
+    # ---------------- Posts ----------------
+    # fetch_posts_service: {is_draft, is_18_plus, type?, theme?, created_at?} sorted by created_at
+    (
+        posts_collection,
+        [("is_draft", 1), ("is_18_plus", 1), ("type", 1), ("theme", 1), ("created_at", -1)],
+        {},
+    ),
+    (posts_collection, [("is_draft", 1), ("is_18_plus", 1), ("created_at", -1)], {}),
+    # fetch_user_posts_service / feed backfill: {author.user_id, is_draft} sorted by created_at
+    (
+        posts_collection,
+        [("author.user_id", 1), ("is_draft", 1), ("created_at", -1), ("_id", -1)],
+        {},
+    ),
+    # fetch_posts_service / fetch_user_posts_service: full-text search on posts
+    (
+        posts_collection,
+        [("title", "text"), ("tags", "text"), ("content", "text")],
+        {
+            "name": "posts_text_search",
+            "weights": {"title": 10, "tags": 5, "content": 1},
+            "default_language": "none",
+        },
+    ),
+    # ---------------- Post relations ----------------
+    (posts_hearts_collection, [("user_id", 1), ("post_id", 1)], {"unique": True}),
+    (posts_hearts_collection, [("post_id", 1), ("hearted_at", -1), ("_id", -1)], {}),
+    (posts_views_collection, [("user_id", 1), ("post_id", 1)], {"unique": True}),
+    (posts_views_collection, [("post_id", 1)], {}),
+    (posts_bookmarks_collection, [("user_id", 1), ("post_id", 1)], {"unique": True}),
+    (posts_bookmarks_collection, [("user_id", 1), ("bookmarked_at", -1), ("_id", -1)], {}),
+    (posts_bookmarks_collection, [("post_id", 1)], {}),
+    (posts_comments_collection, [("post_id", 1), ("created_at", -1), ("_id", -1)], {}),
+    (posts_comments_collection, [("user_id", 1), ("post_id", 1)], {}),
+    # ---------------- Social ----------------
+    (
+        users_connections_collection,
+        [("follower_id", 1), ("following_id", 1)],
+        {"unique": True},
+    ),
+    (users_connections_collection, [("follower_id", 1), ("followed_at", -1), ("_id", -1)], {}),
+    (users_connections_collection, [("following_id", 1), ("followed_at", -1), ("_id", -1)], {}),
+    # ---------------- Feeds ----------------
+    (users_feeds_collection, [("user_id", 1), ("post_id", 1)], {"unique": True}),
+    (users_feeds_collection, [("user_id", 1), ("created_at", -1)], {}),
+    (users_feeds_collection, [("user_id", 1), ("author_id", 1)], {}),
+    (users_feeds_collection, [("post_id", 1)], {}),
+    (
+        users_feed_heads_collection,
+        [("user_id", 1), ("author_id", 1), ("is_18_plus", 1)],
+        {"unique": True},
+    ),
+    (
+        users_feed_heads_collection,
+        [("user_id", 1), ("is_18_plus", 1), ("created_at", -1), ("post_id", -1)],
+        {},
+    ),
+    (users_feed_heads_collection, [("post_id", 1)], {}),
+    # ---------------- Points ----------------
+    (points_collection, [("user_id", 1), ("created_at", -1), ("_id", -1)], {}),
+    (points_collection, [("post_id", 1), ("user_id", 1)], {}),
+    # ---------------- Notifications ----------------
+    (user_notifications_collection, [("user_id", 1), ("created_at", -1), ("_id", -1)], {}),
+    # ---------------- Configs ----------------
+    (content_configs_collection, [("type", 1)], {}),
+]
+
+
+def _sample_query_shapes():
+    """Representative (collection, filter, sort) shapes used by the services."""
+    now = datetime.now(timezone.utc)
+    return [
+        (users_collection, {"user_id": ""}, None),
+        (users_collection, {"email": ""}, None),
+        (user_sessions_collection, {"user_id": "", "device_id": ""}, None),
+        (user_sessions_collection, {"device_id": ""}, None),
+        (users_collection, {"$text": {"$search": "inkly"}}, None),
+        (posts_collection, {"$text": {"$search": "inkly"}, "is_draft": False}, None),
+        (
+            posts_collection,
+            {"is_draft": False, "is_18_plus": False, "type": "story", "theme": ""},
+            [("created_at", -1)],
+        ),
+        (posts_collection, {"is_draft": False, "is_18_plus": False}, [("created_at", -1)]),
+        (
+            posts_collection,
+            {"author.user_id": "", "is_draft": False},
+            [("created_at", -1), ("_id", -1)],
+        ),
+        (posts_hearts_collection, {"post_id": None}, [("hearted_at", -1), ("_id", -1)]),
+        (posts_comments_collection, {"post_id": None}, [("created_at", -1), ("_id", -1)]),
+        (posts_bookmarks_collection, {"user_id": ""}, [("bookmarked_at", -1), ("_id", -1)]),
+        (users_connections_collection, {"follower_id": ""}, [("followed_at", -1), ("_id", -1)]),
+        (users_connections_collection, {"following_id": ""}, [("followed_at", -1), ("_id", -1)]),
+        (users_feeds_collection, {"user_id": "", "created_at": {"$lte": now}}, [("created_at", -1)]),
+        (
+            users_feed_heads_collection,
+            {"user_id": "", "is_18_plus": False},
+            [("created_at", -1), ("post_id", -1)],
+        ),
+        (points_collection, {"user_id": ""}, [("created_at", -1), ("_id", -1)]),
+        (user_notifications_collection, {"user_id": ""}, [("created_at", -1), ("_id", -1)]),
+    ]
+
+
+def _has_collection_scan(plan) -> bool:
+    if isinstance(plan, dict):
+        if plan.get("stage") == "COLLSCAN":
+            return True
+        return any(_has_collection_scan(value) for value in plan.values())
+    if isinstance(plan, list):
+        return any(_has_collection_scan(value) for value in plan)
+    return False
+
+
+async def ensure_indexes():
+    """Create every registered index. Returns the number of failures."""
+    failures = 0
+    for collection, keys, options in INDEXES:
+        try:
+            await collection.create_index(keys, **options)
+        except Exception as e:
+            failures += 1
+            logger.warning(f"⚠️ Failed to create index {collection.name} {keys}: {e}")
+    return failures
+
+
+async def find_collection_scans():
+    """
+    Explain every registered query shape and return the ones whose winning
+    plan still falls back to a collection scan.
+    """
+    scans = []
+    for collection, filter, sort in _sample_query_shapes():
+        cursor = collection.find(filter)
+        if sort:
+            cursor = cursor.sort(sort)
+        explain = await cursor.explain()
+        if _has_collection_scan(explain.get("queryPlanner", {}).get("winningPlan")):
+            logger.warning(f"⚠️ COLLSCAN on {collection.name} for {filter} sort={sort}")
+            scans.append((collection.name, filter, sort))
+    return scans
+
+
+async def _main(check: bool):
+    failures = await ensure_indexes()
+    print(f"🏗️ {len(INDEXES) - failures}/{len(INDEXES)} indexes created/verified")
+    if check:
+        scans = await find_collection_scans()
+        print(f"🔎 {len(scans)} query shapes use a collection scan")
+        return 1 if scans or failures else 0
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_main("--check" in sys.argv)))
@@ -0,0 +1,27 @@
+"""
+One-off data migrations. Each one is idempotent and safe to run while the app
+is serving traffic:
+
+    python -m app.config.database.migrations sessions   # users.devices -> user_sessions
+"""
+import asyncio
+import sys
+from app.services.session_service import migrate_device_sessions
+
+MIGRATIONS = {
+    "sessions": migrate_device_sessions,
+}
+
+
+async def _main(names):
+    for name in names:
+        migrated = await MIGRATIONS[name]()
+        print(f"✅ {name}: {migrated} documents migrated")
+
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(MIGRATIONS)
+    unknown = [name for name in names if name not in MIGRATIONS]
+    if unknown:
+        sys.exit(f"Unknown migrations: {', '.join(unknown)} (available: {', '.join(MIGRATIONS)})")
+    asyncio.run(_main(names))
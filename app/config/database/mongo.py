@@ -16,47 +16,11 @@ user_devices_collection = database.get_collection("user_devices")
 email_config_collection = database.get_collection("email_config")
 users_connections_collection = database.get_collection("users_connections")
 points_collection = database.get_collection("points")
-
-
-async def create_device_id_index():
-    await user_devices_collection.create_index([("device_id", 1)], unique=True)
-
-
-async def create_user_id_index():
-    await users_collection.create_index([("user_id", 1)], unique=True)
-
-
-async def create_user_email_index():
-    await users_collection.create_index([("email", 1)])
-
-
-async def create_user_device_id_index():
-    await users_collection.create_index([("devices.device_id", 1)])
-
-
-async def create_post_view_index():
-    await posts_views_collection.create_index(
-        [("user_id", 1), ("post_id", 1)], unique=True
-    )
-
-
-async def create_post_heart_index():
-    await posts_hearts_collection.create_index(
-        [("user_id", 1), ("post_id", 1)], unique=True
-    )
-
-
-async def create_post_bookmark_index():
-    await posts_bookmarks_collection.create_index(
-        [("user_id", 1), ("post_id", 1)], unique=True
-    )
-
-
+users_feeds_collection = database.get_collection("users_feeds")
+users_feed_heads_collection = database.get_collection("users_feed_heads")
 user_notifications_collection = database.get_collection("user_notifications")
 content_configs_collection = database.get_collection("content_configs")
+user_sessions_collection = database.get_collection("user_sessions")
+revoked_tokens_collection = database.get_collection("revoked_tokens")
 
-
-async def create_user_notifications_index():
-    await user_notifications_collection.create_index(
-        [("user_id", 1), ("created_at", -1)]
-    )
+# Indexes live in app/config/database/indexes.py
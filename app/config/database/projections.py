@@ -0,0 +1,61 @@
+"""
+Named projections for reads on users_collection.
+
+User documents carry the unbounded `referral_codes` array (and, until the
+session migration has run, the legacy `devices` array with access tokens). Every read names the projection it needs so those arrays
+are only transferred by the flows that use them. Reads go through the
+accessors in app/services/user_service.py.
+"""
+
+# Public author card rendered next to posts, hearts, comments and notifications
+AUTHOR_CARD = {
+    "_id": 0,
+    "user_id": 1,
+    "name": 1,
+    "username": 1,
+    "avatar": 1,
+    "is_verified": 1,
+}
+
+# Author card plus the follower count shown in follower / following lists
+CONNECTION_CARD = {**AUTHOR_CARD, "total_followers": 1}
+
+# The signed-in user as the services see it: every field but the unbounded arrays
+ACCOUNT = {"devices": 0, "referral_codes": 0}
+
+# Fields rendered by the profile endpoint
+PROFILE = {
+    "_id": 0,
+    "user_id": 1,
+    "name": 1,
+    "avatar": 1,
+    "username": 1,
+    "bio": 1,
+    "email": 1,
+    "gender": 1,
+    "interests": 1,
+    "total_drafts": 1,
+    "total_stories": 1,
+    "total_jokes": 1,
+    "total_poetry": 1,
+    "total_quotes": 1,
+    "total_points": 1,
+    "total_followers": 1,
+    "total_following": 1,
+    "total_bookmarks": 1,
+}
+
+# Existence checks and writes keyed by _id
+IDENTITY = {"_id": 1, "user_id": 1}
+
+POINTS = {"_id": 0, "total_points": 1}
+
+# Account fields used by the login / token flows
+AUTH = {
+    "_id": 1,
+    "user_id": 1,
+    "email": 1,
+    "username": 1,
+    "interests": 1,
+    "created_at": 1,
+}
@@ -1,5 +1,5 @@
 from typing import Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from app.utils.enums.Gender import Gender
 from app.utils.enums.ResponseStatus import ResponseStatus
 from fastapi import Query
@@ -15,6 +15,7 @@ class MyResponse(BaseModel):
     total: Optional[int] = None
     result: Optional[any] = None
     results: Optional[any] = None
+    next_cursor: Optional[str] = None
     model_config = {"arbitrary_types_allowed": True}
 
 
@@ -59,6 +60,7 @@ class PostFilterParams(BaseModel):
     sort_by: Optional[PostSortBy] = PostSortBy.NEWEST
     page: int = Query(1, gt=0)
     limit: int = Query(10, gt=0, le=100)
+    cursor: Optional[str] = None
 
 
 class SendOTP(BaseModel):
@@ -102,3 +104,8 @@ class RegenerateTokenRequest(BaseModel):
 class RedeemReferralCodeRequest(BaseModel):
     referral_code: str
 
+
+
+class ViewBatchRequest(BaseModel):
+    # One scrolled page of impressions per call
+    post_ids: list[str] = Field(..., min_length=1, max_length=100)
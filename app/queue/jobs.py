@@ -0,0 +1,92 @@
+"""
+Bounded in-process queue for work that should not hold up a request.
+
+Endpoints `submit` a job of a registered kind and return; `job_worker` pulls
+jobs off the queue, groups whatever is already waiting by kind and hands each
+group to its handler in one call, so handlers can batch their writes.
+"""
+import asyncio
+import logging
+from collections import defaultdict
+from app.utils.settings import settings
+
+logger = logging.getLogger("uvicorn")
+
+
+class JobQueue:
+    def __init__(self, maxsize: int, batch_size: int, enqueue_timeout: float):
+        self._queue = asyncio.Queue(maxsize=maxsize)
+        self._handlers = {}
+        self.batch_size = batch_size
+        self.enqueue_timeout = enqueue_timeout
+        self.metrics = defaultdict(int)
+
+    def register(self, kind: str, handler):
+        """`handler(payloads: list)` processes a batch of jobs of `kind`."""
+        self._handlers[kind] = handler
+
+    async def submit(self, kind: str, payload) -> bool:
+        """
+        Queue a job. When the queue is full the caller waits up to
+        `enqueue_timeout` for room (backpressure) and the job is dropped after
+        that, so a stuck worker can never stall requests indefinitely.
+        """
+        if kind not in self._handlers:
+            raise KeyError(f"No handler registered for job kind '{kind}'")
+        try:
+            self._queue.put_nowait((kind, payload))
+        except asyncio.QueueFull:
+            self.metrics["backpressured"] += 1
+            try:
+                await asyncio.wait_for(
+                    self._queue.put((kind, payload)), self.enqueue_timeout
+                )
+            except asyncio.TimeoutError:
+                self.metrics["dropped"] += 1
+                logger.warning(f"⚠️ Job queue full, dropped '{kind}' job")
+                return False
+        self.metrics["submitted"] += 1
+        return True
+
+    async def next_batch(self) -> dict:
+        """Wait for a job, then take the ones already queued up to `batch_size`."""
+        jobs = [await self._queue.get()]
+        while len(jobs) < self.batch_size:
+            try:
+                jobs.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        batches = defaultdict(list)
+        for kind, payload in jobs:
+            batches[kind].append(payload)
+        return batches
+
+    async def process(self, batches: dict):
+        for kind, payloads in batches.items():
+            try:
+                await self._handlers[kind](payloads)
+                self.metrics["processed"] += len(payloads)
+            except Exception as e:
+                self.metrics["failed"] += len(payloads)
+                logger.error(f"❌ Failed to process {len(payloads)} '{kind}' jobs: {e}")
+            finally:
+                self.metrics["batches"] += 1
+                for _ in payloads:
+                    self._queue.task_done()
+
+    async def drain(self, timeout: float):
+        """Wait for queued jobs to be processed, up to `timeout` seconds."""
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"⚠️ {self._queue.qsize()} background jobs left unprocessed")
+
+    def stats(self) -> dict:
+        return {**self.metrics, "queued": self._queue.qsize(), "capacity": self._queue.maxsize}
+
+
+job_queue = JobQueue(
+    maxsize=settings.job_queue_size,
+    batch_size=settings.job_batch_size,
+    enqueue_timeout=settings.job_enqueue_timeout_ms / 1000,
+)
@@ -1,14 +1,18 @@
+import logging
 from typing import Annotated, Optional
 from fastapi import APIRouter, Depends, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from app.services.content_service import (
     delete_post_service,
     generate_content_from_llm_service,
+    stream_content_from_llm_service,
     fetch_related_images_service,
     fetch_posts_service,
     fetch_post_service,
     fetch_user_posts_service,
     save_post_service,
     save_view_count_service,
+    save_view_counts_service,
     delete_comment_service,
     toggle_bookmark_service,
     toggle_heart_service,
@@ -21,15 +25,31 @@ from app.services.content_service import (
     fetch_content_config_service,
 )
 from app.utils.enums.PostFilters import PostDuration, PostSortBy, PostFilter
-from app.models.schema import CommentText, MyResponse, PostRequest, PostFilterParams
+from app.models.schema import (
+    CommentText,
+    MyResponse,
+    PostRequest,
+    PostFilterParams,
+    ViewBatchRequest,
+)
 from app.utils.enums.PostType import PostType
 from app.utils.enums.ResponseStatus import ResponseStatus
 from app.config.auth.dependencies import get_current_user, get_current_user_ws
 from app.utils.notification_manager import notification_manager
-from app.utils.cache_manager import cache_manager
+from app.utils.cache_manager import cache_key, cache_manager
+from app.utils.cache_tags import (
+    author_tags,
+    bookmarks_tag,
+    comments_tag,
+    hearts_tag,
+    post_tags,
+    user_posts_tag,
+    viewer_tag,
+)
 
 
 content_router = APIRouter()
+logger = logging.getLogger("uvicorn")
 
 # that's how we use dependency injection
 current_user_dependency = Annotated[MyResponse, Depends(get_current_user)]
@@ -52,6 +72,8 @@ async def generate_content_from_llm(
     theme: Optional[str] = "inspiring",
     language: Optional[str] = "English",
     model: Optional[str] = "gemini",
+    # Accept a shared generation of the same normalized prompt, e.g. for presets
+    cached: bool = False,
 ):
     if auth_response.status == ResponseStatus.FAILURE:
         return auth_response
@@ -65,10 +87,47 @@ async def generate_content_from_llm(
         size,
         language,
         model,
+        cached,
+    )
+
+
+@content_router.get("/v1/generate/stream")
+async def stream_content_from_llm(
+    auth_response: current_user_dependency,
+    ai_key: str,
+    type: PostType,
+    prompt: str,
+    size: int,
+    theme: Optional[str] = "inspiring",
+    language: Optional[str] = "English",
+    model: Optional[str] = "gemini",
+):
+    if auth_response.status == ResponseStatus.FAILURE:
+        return auth_response
+
+    result = await stream_content_from_llm_service(
+        auth_response.result["user_id"],
+        ai_key,
+        type,
+        prompt,
+        theme,
+        size,
+        language,
+        model,
+    )
+    if isinstance(result, MyResponse):
+        return result
+    return StreamingResponse(
+        result,
+        media_type="text/event-stream",
+        # Keep proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 @content_router.get("/v1/posts", response_model=MyResponse)
-@cache_manager.cached(tags=["posts"])
+@cache_manager.cached(
+    tags=["posts", viewer_tag, post_tags, author_tags], key=cache_key("params")
+)
 async def fetch_posts(
 
     auth_response: current_user_dependency,
@@ -82,7 +141,7 @@ async def fetch_posts(
     )
 
 @content_router.get("/v1/posts/{post_id}", response_model=MyResponse)
-@cache_manager.cached(tags=["posts"])
+@cache_manager.cached(tags=[viewer_tag, post_tags, author_tags], key=cache_key("post_id"))
 async def fetch_post(auth_response: current_user_dependency, post_id: str):
 
     if auth_response.status == ResponseStatus.FAILURE:
@@ -90,7 +149,10 @@ async def fetch_post(auth_response: current_user_dependency, post_id: str):
     return await fetch_post_service(auth_response.result["user_id"], post_id)
 
 @content_router.get("/v1/user_posts", response_model=MyResponse)
-@cache_manager.cached(tags=["posts"])
+@cache_manager.cached(
+    tags=["posts", viewer_tag, user_posts_tag, post_tags, author_tags],
+    key=cache_key("types", "search", "user_id", "is_draft", "page", "limit", "cursor"),
+)
 async def fetch_user_posts(
 
     auth_response: current_user_dependency,
@@ -100,11 +162,12 @@ async def fetch_user_posts(
     is_draft: bool = False,
     page: int = Query(1, gt=0),
     limit: int = Query(10, gt=0, le=100),
+    cursor: Optional[str] = None,
 ):
     if auth_response.status == ResponseStatus.FAILURE:
         return auth_response
     return await fetch_user_posts_service(
-        auth_response.result["user_id"], user_id, is_draft, types, search, page, limit
+        auth_response.result["user_id"], user_id, is_draft, types, search, page, limit, cursor
     )
 
 
@@ -117,11 +180,15 @@ async def save_post(
 ):
     if auth_response.status == ResponseStatus.FAILURE:
         return auth_response
-    result = await save_post_service(
-        auth_response.result["user_id"], request, type, post_id
-    )
+    user_id = auth_response.result["user_id"]
+    result = await save_post_service(user_id, request, type, post_id)
     if result.status == ResponseStatus.SUCCESS:
-        cache_manager.invalidate(["posts", "user_profile"])
+        tags = [f"profile:{user_id}", f"user_posts:{user_id}"]
+        if post_id:
+            tags.append(f"post:{post_id}")
+        # "posts" is invalidated once a published post is fanned out to the
+        # feeds (see feed_service.submit_fan_out)
+        await cache_manager.invalidate(tags)
     return result
 
 
@@ -133,9 +200,18 @@ async def delete_post(
 ):
     if auth_response.status == ResponseStatus.FAILURE:
         return auth_response
-    result = await delete_post_service(auth_response.result["user_id"], post_id)
+    user_id = auth_response.result["user_id"]
+    result = await delete_post_service(user_id, post_id)
     if result.status == ResponseStatus.SUCCESS:
-        cache_manager.invalidate(["posts", "hearts", "comments", "bookmarks", "user_profile"])
+        await cache_manager.invalidate(
+            [
+                f"post:{post_id}",
+                f"hearts:{post_id}",
+                f"comments:{post_id}",
+                f"profile:{user_id}",
+                f"user_posts:{user_id}",
+            ]
+        )
     return result
 
 
@@ -146,7 +222,24 @@ async def save_post_view_count(auth_response: current_user_dependency, post_id:
         return auth_response
     result = await save_view_count_service(auth_response.result["user_id"], post_id)
     if result.status == ResponseStatus.SUCCESS:
-        cache_manager.invalidate("posts")
+        await cache_manager.invalidate(f"post:{post_id}")
+    return result
+
+
+@content_router.post("/v1/views", response_model=MyResponse)
+async def save_post_view_counts(
+    auth_response: current_user_dependency, request: ViewBatchRequest
+):
+    if auth_response.status == ResponseStatus.FAILURE:
+        return auth_response
+    result = await save_view_counts_service(
+        auth_response.result["user_id"], request.post_ids
+    )
+    if result.status == ResponseStatus.SUCCESS:
+        # Only posts whose counter moved need fresh renderings
+        counted = [f"post:{view['post_id']}" for view in result.results if view["counted"]]
+        if counted:
+            await cache_manager.invalidate(counted)
     return result
 
 
@@ -154,9 +247,12 @@ async def save_post_view_count(auth_response: current_user_dependency, post_id:
 async def save_bookmark(auth_response: current_user_dependency, post_id: str):
     if auth_response.status == ResponseStatus.FAILURE:
         return auth_response
-    result = await toggle_bookmark_service(auth_response.result["user_id"], post_id)
+    user_id = auth_response.result["user_id"]
+    result = await toggle_bookmark_service(user_id, post_id)
     if result.status == ResponseStatus.SUCCESS:
-        cache_manager.invalidate(["bookmarks", "posts", "user_profile"])
+        await cache_manager.invalidate(
+            [f"post:{post_id}", f"bookmarks:{user_id}", f"profile:{user_id}"]
+        )
     return result
 
 
@@ -165,49 +261,63 @@ async def save_bookmark(auth_response: current_user_dependency, post_id: str):
 async def save_heart(auth_response: current_user_dependency, post_id: str):
     if auth_response.status == ResponseStatus.FAILURE:
         return auth_response
-    result = await toggle_heart_service(auth_response.result["user_id"], post_id)
+    user_id = auth_response.result["user_id"]
+    result = await toggle_heart_service(user_id, post_id)
     if result.status == ResponseStatus.SUCCESS:
-        cache_manager.invalidate(["hearts", "posts", "user_profile"])
+        await cache_manager.invalidate(
+            [f"post:{post_id}", f"hearts:{post_id}", f"profile:{user_id}"]
+        )
     return result
 
 
 
 @content_router.get("/v1/hearts/{post_id}", response_model=MyResponse)
-@cache_manager.cached(tags=["hearts"])
+@cache_manager.cached(
+    tags=[viewer_tag, hearts_tag, post_tags, author_tags],
+    key=cache_key("post_id", "page", "limit", "cursor"),
+)
 async def fetch_hearts(auth_response: current_user_dependency, post_id: str, page: int = Query(1, gt=0),
 
-    limit: int = Query(10, gt=0, le=100)):
+    limit: int = Query(10, gt=0, le=100), cursor: Optional[str] = None):
     if auth_response.status == ResponseStatus.FAILURE:
         return auth_response
-    return await fetch_heart_service(auth_response.result["user_id"], post_id, page, limit)
+    return await fetch_heart_service(auth_response.result["user_id"], post_id, page, limit, cursor)
 
 
 @content_router.get("/v1/bookmarks", response_model=MyResponse)
-@cache_manager.cached(tags=["bookmarks"])
+@cache_manager.cached(
+    tags=[viewer_tag, bookmarks_tag, post_tags, author_tags],
+    key=cache_key("page", "limit", "cursor"),
+)
 async def fetch_bookmarks(
 
     auth_response: current_user_dependency,
     page: int = Query(1, gt=0),
     limit: int = Query(10, gt=0, le=100),
+    cursor: Optional[str] = None,
 ):
     if auth_response.status == ResponseStatus.FAILURE:
         return auth_response
-    return await fetch_bookmarks_service(auth_response.result["user_id"], page, limit)
+    return await fetch_bookmarks_service(auth_response.result["user_id"], page, limit, cursor)
 
 
 @content_router.get("/v1/comments/{post_id}")
-@cache_manager.cached(tags=["comments"])
+@cache_manager.cached(
+    tags=[viewer_tag, comments_tag, post_tags, author_tags],
+    key=cache_key("post_id", "page", "limit", "cursor"),
+)
 async def fetch_comments(
 
     auth_response: current_user_dependency,
     post_id: str,
     page: int = Query(1, gt=0),
     limit: int = Query(10, gt=0, le=100),
+    cursor: Optional[str] = None,
 ):
     if auth_response.status == ResponseStatus.FAILURE:
         return auth_response
     return await fetch_comments_service(
-        auth_response.result["user_id"], post_id, page, limit
+        auth_response.result["user_id"], post_id, page, limit, cursor
     )
 
 
@@ -217,11 +327,12 @@ async def save_comment(
 ):
     if auth_response.status == ResponseStatus.FAILURE:
         return auth_response
-    result = await save_comment_service(
-        auth_response.result["user_id"], post_id, text.text
-    )
+    user_id = auth_response.result["user_id"]
+    result = await save_comment_service(user_id, post_id, text.text)
     if result.status == ResponseStatus.SUCCESS:
-        cache_manager.invalidate(["comments", "posts"])
+        await cache_manager.invalidate(
+            [f"post:{post_id}", f"comments:{post_id}", f"profile:{user_id}"]
+        )
     return result
 
 
@@ -230,9 +341,13 @@ async def save_comment(
 async def delete_comment(auth_response: current_user_dependency, comment_id: str):
     if auth_response.status == ResponseStatus.FAILURE:
         return auth_response
-    result = await delete_comment_service(auth_response.result["user_id"], comment_id)
+    user_id = auth_response.result["user_id"]
+    result = await delete_comment_service(user_id, comment_id)
     if result.status == ResponseStatus.SUCCESS:
-        cache_manager.invalidate(["comments", "posts"])
+        post_id = result.result["post_id"]
+        await cache_manager.invalidate(
+            [f"post:{post_id}", f"comments:{post_id}", f"profile:{user_id}"]
+        )
     return result
 
 
@@ -242,11 +357,12 @@ async def fetch_notifications(
     auth_response: current_user_dependency,
     page: int = Query(1, gt=0),
     limit: int = Query(10, gt=0, le=100),
+    cursor: Optional[str] = None,
 ):
     if auth_response.status == ResponseStatus.FAILURE:
         return auth_response
     return await fetch_user_notifications_service(
-        auth_response.result["user_id"], page, limit
+        auth_response.result["user_id"], page, limit, cursor
     )
 
 
@@ -261,7 +377,7 @@ async def mark_notification_as_read(
 
 
 @content_router.get("/v1/config", response_model=MyResponse)
-@cache_manager.cached(tags=["config"])
+@cache_manager.cached(tags=["config"], key=cache_key(viewer=False))
 async def fetch_content_config(auth_response: current_user_dependency):
 
     if auth_response.status == ResponseStatus.FAILURE:
@@ -282,6 +398,9 @@ async def websocket_notifications(websocket: WebSocket, token: str):
         while True:
             # Keep the connection open and listen for any client messages (though we mainly push)
             data = await websocket.receive_text()
+            if data == "ping":
+                notification_manager.send(user_id, websocket, {"type": "pong"})
+                continue
             # We can handle client messages here if needed, but for now just log
             logger.info(f"Received message from user {user_id}: {data}")
     except WebSocketDisconnect:
@@ -9,6 +9,7 @@ from app.services.social_service import (
 from app.models.schema import MyResponse
 from app.utils.enums.ResponseStatus import ResponseStatus
 from app.config.auth.dependencies import get_current_user
+from app.utils.cache_manager import cache_manager
 
 
 social_router = APIRouter()
@@ -22,11 +23,12 @@ async def fetch_followers(
     user_id: Optional[str] = None,
     page: int = Query(1, gt=0),
     limit: int = Query(10, gt=0, le=100),
+    cursor: Optional[str] = None,
 ):
     if auth_response.status == ResponseStatus.FAILURE:
         return auth_response
     return await fetch_followers_service(
-        auth_response.result["user_id"], user_id, page, limit
+        auth_response.result["user_id"], user_id, page, limit, cursor
     )
 
 
@@ -36,11 +38,12 @@ async def fetch_following(
     user_id: Optional[str] = None,
     page: int = Query(1, gt=0),
     limit: int = Query(10, gt=0, le=100),
+    cursor: Optional[str] = None,
 ):
     if auth_response.status == ResponseStatus.FAILURE:
         return auth_response
     return await fetch_following_service(
-        auth_response.result["user_id"], user_id, page, limit
+        auth_response.result["user_id"], user_id, page, limit, cursor
     )
 
 
@@ -51,7 +54,13 @@ async def save_follow(
 ):
     if auth_response.status == ResponseStatus.FAILURE:
         return auth_response
-    return await save_follow_service(auth_response.result["user_id"], user_id)
+    login_user_id = auth_response.result["user_id"]
+    result = await save_follow_service(login_user_id, user_id)
+    if result.status == ResponseStatus.SUCCESS:
+        await cache_manager.invalidate(
+            [f"viewer:{login_user_id}", f"profile:{login_user_id}", f"profile:{user_id}"]
+        )
+    return result
 
 
 @social_router.post("/v1/unfollow", response_model=MyResponse)
@@ -61,4 +70,10 @@ async def save_unfollow(
 ):
     if auth_response.status == ResponseStatus.FAILURE:
         return auth_response
-    return await save_unfollow_service(auth_response.result["user_id"], user_id)
+    login_user_id = auth_response.result["user_id"]
+    result = await save_unfollow_service(login_user_id, user_id)
+    if result.status == ResponseStatus.SUCCESS:
+        await cache_manager.invalidate(
+            [f"viewer:{login_user_id}", f"profile:{login_user_id}", f"profile:{user_id}"]
+        )
+    return result
@@ -16,7 +16,8 @@ from app.services.user_service import (
     generate_referral_codes_service,
     redeem_referral_code_service,
 )
-from app.utils.cache_manager import cache_manager
+from app.utils.cache_manager import cache_key, cache_manager
+from app.utils.cache_tags import profile_tag, viewer_tag
 
 from app.utils.enums.ResponseStatus import ResponseStatus
 from app.config.auth.dependencies import get_current_user
@@ -40,14 +41,14 @@ current_user_dependency = Annotated[MyResponse, Depends(get_current_user)]
 
 
 @user_router.get("/v1/interests")
-@cache_manager.cached(tags=["interests"])
+@cache_manager.cached(tags=["interests"], key=cache_key(viewer=False))
 async def fetch_interests():
 
     return await fetch_interests_service()
 
 
 @user_router.get("/v1/prefrence", response_model=MyResponse)
-@cache_manager.cached(tags=["user_pref"])
+@cache_manager.cached(tags=["user_pref"], key=cache_key("device_id", "user_id", viewer=False))
 async def fetch_prefrences(device_id: str, user_id: Optional[str] = None):
 
     return await fetch_prefrences_service(device_id, user_id)
@@ -57,7 +58,7 @@ async def fetch_prefrences(device_id: str, user_id: Optional[str] = None):
 async def save_prefrence(request: PrefrenceRequest):
     result = await save_prefrence_service(request)
     if result.status == ResponseStatus.SUCCESS:
-        cache_manager.invalidate("user_pref")
+        await cache_manager.invalidate("user_pref")
     return result
 
 
@@ -69,14 +70,14 @@ async def register_device(request: RegisterDeviceRequest):
 
 @user_router.get("/v1/points")
 async def fetch_points(auth_response: current_user_dependency, page: int = Query(1, gt=0),
-    limit: int = Query(10, gt=0, le=100)):
+    limit: int = Query(10, gt=0, le=100), cursor: Optional[str] = None):
     if auth_response.status == ResponseStatus.FAILURE:
         return auth_response
-    return await fetch_user_points_service(auth_response.result["user_id"], page, limit)
+    return await fetch_user_points_service(auth_response.result["user_id"], page, limit, cursor)
 
 
 @user_router.get("/v1/profile")
-@cache_manager.cached(tags=["user_profile"])
+@cache_manager.cached(tags=[viewer_tag, profile_tag], key=cache_key("user_id"))
 async def fetch_profile(
     auth_response: current_user_dependency, user_id: Optional[str] = None
 ):
@@ -92,9 +93,10 @@ async def fetch_profile(
 ):
     if auth_response.status == ResponseStatus.FAILURE:
         return auth_response
-    result = await update_user_profile_service(auth_response.result["user_id"], request)
+    user_id = auth_response.result["user_id"]
+    result = await update_user_profile_service(user_id, request)
     if result.status == ResponseStatus.SUCCESS:
-        cache_manager.invalidate(["user_profile", "posts"])
+        await cache_manager.invalidate([f"profile:{user_id}", f"author:{user_id}"])
     return result
 
 
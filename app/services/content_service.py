@@ -1,21 +1,30 @@
 import asyncio
+from functools import partial
 from datetime import datetime, timezone, timedelta
 import logging
 import re
 import json
 from bson import ObjectId
 from bson import errors as bson_errors
+from cachetools import TTLCache
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 import httpx
-from pymongo import ReturnDocument
 from app.models.schema import PostRequest, PostFilterParams
 from app.utils.enums.PostType import PostType
 from app.utils.enums.PostFilters import PostDuration, PostSortBy, PostFilter
-from app.utils.gemini import ask_from_gemini
-from app.utils.openai import ask_from_openai
+from app.utils.llm_provider import extract_json_from_llm
+from app.utils.json_stream import GenerationStreamParser
+from app.utils.llm import generate_content, stream_content
+from app.utils.generation_cache import generation_key, get_or_generate
 from app.utils.methods import (
+    apply_cursor,
+    build_keyset_query,
+    build_next_cursor,
     convert_iso_date_to_humanize,
     create_success_response,
     create_exception_response,
+    sse_event,
 )
 from app.utils.messages import (
     ACTION_SUCCESS,
@@ -24,7 +33,23 @@ from app.utils.messages import (
     NOT_FOUND,
 )
 from app.utils.constants import CONTENT_CONFIGS_DATA
-from app.services.user_service import get_verified_user
+from app.services.user_service import (
+    fetch_authors_map,
+    get_user,
+    get_verified_user,
+)
+from app.config.database.projections import AUTHOR_CARD, IDENTITY
+from app.services.counter_service import discard_stats, fold_stats, increment_stat
+from app.services.notification_service import notify_user
+from app.services.toggle_service import BOOKMARK, HEART, clamped_inc, flip
+from app.services.feed_service import (
+    count_feed_authors,
+    ensure_feed,
+    fetch_feed_posts,
+    remove_post_from_feeds,
+    submit_fan_out,
+    sync_post_in_feeds,
+)
 from app.config.database.mongo import (
     posts_collection,
     users_collection,
@@ -38,11 +63,22 @@ from app.config.database.mongo import (
     content_configs_collection,
 )
 from app.utils.settings import settings
-from app.utils.notification_manager import notification_manager
+from app.utils.cache_manager import cache_manager
 # Removal of CONTENT_CONFIG import
 
 logger = logging.getLogger("uvicorn")
 
+# Feed totals per filter combination. The first request of a listing pays
+# for the count; later pages reuse the cached value.
+_posts_total_cache = TTLCache(maxsize=5000, ttl=60)
+
+
+@cache_manager.on_invalidate
+def _forget_posts_totals(tags: list):
+    # A publish in any worker changes the totals cached by every worker
+    if "posts" in tags:
+        _posts_total_cache.clear()
+
 
 async def get_content_config(post_type: PostType):
     """Utility to fetch config for a specific post type"""
@@ -86,6 +122,23 @@ async def fetch_related_images_service(login_user_id: str, title: str):
     )
 
 
+def _generation_error(e: Exception):
+    """(status_code, message) of a failed generation, shared by /v1/generate and its stream"""
+    if isinstance(e, asyncio.TimeoutError):
+        logger.error(f"AI model timed out after {settings.llm_timeout_seconds}s")
+        return 504, "Content generation timed out, please try again"
+    # JSONDecodeError is a ValueError: match it first
+    if isinstance(e, json.JSONDecodeError):
+        logger.error(f"Failed to parse LLM response: {e}")
+        return 500, "Invalid JSON returned from LLM"
+    if isinstance(e, ValueError):
+        # Handle errors from AI utilities (rate limits, auth errors, etc.)
+        logger.error(f"AI model error: {e}")
+        return 400, str(e)
+    logger.error(f"Unexpected error in content generation: {e}")
+    return 500, f"Failed to generate content: {str(e)}"
+
+
 async def generate_content_from_llm_service(
     login_user_id: str,
     ai_key: str,
@@ -95,6 +148,7 @@ async def generate_content_from_llm_service(
     size: int = 50,
     language: str = "English",
     model: str = "gemini",
+    cached: bool = False,
 ):
     logger.info("content_service.generate_content_from_llm_service")
 
@@ -104,12 +158,17 @@ async def generate_content_from_llm_service(
         return error
     
     try:
-        # Route to appropriate AI model
-        if model.lower() == "openai":
-            output = ask_from_openai(ai_key, type, prompt, size, language, theme)
-        else:  # Default to Gemini
-            output = ask_from_gemini(ai_key, type, prompt, size, language, theme)
-        
+        # Runs on the LLM thread pool so the event loop keeps serving other requests
+        generate = partial(
+            generate_content, model, ai_key, type, prompt, size, language, theme
+        )
+        if cached and settings.generation_cache_variants > 0:
+            output = await get_or_generate(
+                generation_key(type, prompt, theme, size, language, model), generate
+            )
+        else:
+            output = await generate()
+
         if not output:
             return create_exception_response(500, "LLM returned empty output")
 
@@ -117,63 +176,177 @@ async def generate_content_from_llm_service(
         content = output.get("content", "")
         tags = output.get("tags", [])
 
-    except ValueError as e:
-        # Handle errors from AI utilities (rate limits, auth errors, etc.)
-        logger.error(f"AI model error: {e}")
-        return create_exception_response(400, str(e))
-    except json.JSONDecodeError as e:
-        logger.error(f"Failed to parse LLM response: {e}")
-        return create_exception_response(500, "Invalid JSON returned from LLM")
     except Exception as e:
-        logger.error(f"Unexpected error in content generation: {e}")
-        return create_exception_response(500, f"Failed to generate content: {str(e)}")
+        return create_exception_response(*_generation_error(e))
 
     return create_success_response(
         200,
         FETCHED_SUCCESS.format(data="generated content"),
-        query={"type": type, "prompt": prompt, "theme": theme, "size": size, "model": model},
+        query={"type": type, "prompt": prompt, "theme": theme, "size": size, "model": model, "cached": cached},
         result={"title": title, "content": content, "tags": tags},
     )
 
-async def fetch_post_service(login_user_id: str, post_id: str):
-    logger.info("content_service.fetch_post_service")
 
-    # Verify user
+# Payload of each streamed event: the title and tags once complete, content as deltas
+_STREAM_EVENT_FIELDS = {"title": "title", "content": "delta", "tags": "tags"}
+
+
+async def _stream_generation(ai_key, type, prompt, theme, size, language, model):
+    parser = GenerationStreamParser()
+    text = []
+    try:
+        async for chunk in stream_content(model, ai_key, type, prompt, size, language, theme):
+            text.append(chunk)
+            for event, value in parser.feed(chunk):
+                yield sse_event(event, {_STREAM_EVENT_FIELDS[event]: value})
+
+        # The full object, for clients that only keep the final result
+        output = extract_json_from_llm("".join(text))
+        yield sse_event(
+            "done",
+            {
+                "title": output.get("title", ""),
+                "content": output.get("content", ""),
+                "tags": output.get("tags", []),
+            },
+        )
+    except Exception as e:
+        status_code, message = _generation_error(e)
+        yield sse_event("error", {"status_code": status_code, "message": message})
+
+
+async def stream_content_from_llm_service(
+    login_user_id: str,
+    ai_key: str,
+    type: PostType = None,
+    prompt: str = "a little boy",
+    theme: str = None,
+    size: int = 50,
+    language: str = "English",
+    model: str = "gemini",
+):
+    """
+    Server-sent events relaying the generation as the provider produces it:
+    `title`, `content` deltas and `tags`, then `done` with the full result
+    (or `error`). Returns an error response when the user cannot be verified.
+    """
+    logger.info("content_service.stream_content_from_llm_service")
+
     saved_user, error = await get_verified_user(login_user_id)
     if error:
         return error
+    return _stream_generation(ai_key, type, prompt, theme, size, language, model)
+
+
+async def fetch_post_service(login_user_id: str, post_id: str):
+    logger.info("content_service.fetch_post_service")
 
     try:
         post_oid = ObjectId(post_id)
     except Exception:
         return create_exception_response(400, "Invalid post_id")
-    # Fetch post
-    post = await posts_collection.find_one({"_id": post_oid})
+
+    # Verify user and fetch the post with the viewer's state concurrently
+    (saved_user, error), post = await asyncio.gather(
+        get_verified_user(login_user_id),
+        _fetch_post_with_viewer_state(post_oid, login_user_id),
+    )
+    if error:
+        return error
     if not post:
         return create_exception_response(404, NOT_FOUND.format(data="post"))
 
     return create_success_response(
         200,
         FETCHED_SUCCESS.format(data="post"),
-        result=await _format_post_data(post, saved_user),
+        result=_format_post_data(post),
     )
 
-async def _format_post_data(post: dict, user: dict):
-    is_following = await users_connections_collection.find_one({"following_id": user.get("user_id"), 
-        "follower_id": post.get("author").get("user_id")})
-    is_following = True if is_following else False
 
-    query = {"user_id": user.get("user_id"), "post_id": post.get("_id")}
+def _viewer_relation_lookup(collection, viewer_id: str, post_oid: ObjectId, field: str):
+    return {
+        "$lookup": {
+            "from": collection.name,
+            "pipeline": [
+                {"$match": {"user_id": viewer_id, "post_id": post_oid}},
+                {"$limit": 1},
+                {"$project": {"_id": 1}},
+            ],
+            "as": field,
+        }
+    }
 
-    is_hearted = await posts_hearts_collection.find_one(query)
-    is_hearted = True if is_hearted else False
 
-    is_commented = await posts_comments_collection.find_one(query) 
-    is_commented = True if is_commented else False
+async def _fetch_post_with_viewer_state(post_oid: ObjectId, viewer_id: str):
+    """
+    Load a post together with its author card and the viewer's follow, heart,
+    comment and bookmark state in a single aggregation round trip.
+    """
+    pipeline = [
+        {"$match": {"_id": post_oid}},
+        {
+            "$lookup": {
+                "from": users_collection.name,
+                "let": {"author_id": "$author.user_id"},
+                "pipeline": [
+                    {"$match": {"$expr": {"$eq": ["$user_id", "$$author_id"]}}},
+                    {"$limit": 1},
+                    {"$project": AUTHOR_CARD},
+                ],
+                "as": "viewer_author",
+            }
+        },
+        {
+            "$lookup": {
+                "from": users_connections_collection.name,
+                "let": {"author_id": "$author.user_id"},
+                "pipeline": [
+                    {
+                        "$match": {
+                            "$expr": {
+                                "$and": [
+                                    {"$eq": ["$follower_id", viewer_id]},
+                                    {"$eq": ["$following_id", "$$author_id"]},
+                                ]
+                            }
+                        }
+                    },
+                    {"$limit": 1},
+                    {"$project": {"_id": 1}},
+                ],
+                "as": "viewer_following",
+            }
+        },
+        _viewer_relation_lookup(posts_hearts_collection, viewer_id, post_oid, "viewer_hearted"),
+        _viewer_relation_lookup(posts_comments_collection, viewer_id, post_oid, "viewer_commented"),
+        _viewer_relation_lookup(posts_bookmarks_collection, viewer_id, post_oid, "viewer_bookmarked"),
+    ]
+    posts = await posts_collection.aggregate(pipeline).to_list(length=1)
+    return posts[0] if posts else None
+
+
+def _format_post_data(post: dict):
+    post_user_id = post.get("author", {}).get("user_id", "")
+    if post.get("is_anonymous"):
+        author = {
+            "user_id": "",
+            "name": "Anonymous",
+            "username": "anonymous",
+            "avatar": "https://cdn-icons-png.flaticon.com/512/149/149071.png",
+            "is_following": False,
+            "is_verified": False,
+        }
+    else:
+        post_author = next(iter(post.get("viewer_author", [])), {})
+        author = {
+            "user_id": post_user_id,
+            "name": post_author.get("name", "Unknown"),
+            "username": post_author.get("username", "unknown"),
+            "avatar": post_author.get("avatar", "https://i.pravatar.cc/300?img=3"),
+            "is_following": bool(post.get("viewer_following")),
+            "is_verified": False,
+        }
 
-    is_bookmarked = await posts_bookmarks_collection.find_one(query)
-    is_bookmarked = True if is_bookmarked else False
-    
     return {
         "id": str(post.get("_id")),
         "type": post.get("type", ""),
@@ -181,21 +354,14 @@ async def _format_post_data(post: dict, user: dict):
         "image": post.get("image", ""),
         "content": post.get("content", ""),
         "theme": post.get("theme", ""),
-        "author": {
-            "user_id": user.get("user_id", ""),
-            "name": user.get("name", ""),
-            "username": user.get("username", ""),
-            "avatar": user.get("avatar", ""),
-            "is_following": is_following,
-            "is_verified": False,
-        },
-        "is_hearted": is_hearted,
-        "is_commented": is_commented,
-        "is_bookmarked": is_bookmarked,
+        "author": author,
+        "is_hearted": bool(post.get("viewer_hearted")),
+        "is_commented": bool(post.get("viewer_commented")),
+        "is_bookmarked": bool(post.get("viewer_bookmarked")),
         "is_18_plus": post.get("is_18_plus", False),
         "is_anonymous": post.get("is_anonymous", False),
         "is_for_kids": post.get("is_for_kids", False),
-        "stats": post.get("stats", {}),
+        "stats": fold_stats(post["_id"], post.get("stats")),
         "created_at_readable": convert_iso_date_to_humanize(
             post.get("created_at")
         ),
@@ -255,10 +421,8 @@ async def fetch_posts_service(
         query["tags"] = params.tag
     
     if params.search:
-        query["$or"] = [
-            {"title": {"$regex": params.search, "$options": "i"}},
-            {"content": {"$regex": params.search, "$options": "i"}},
-        ]
+        # Served by the posts text index (see app/config/database/indexes.py)
+        query["$text"] = {"$search": params.search}
 
     # ---------------- Filter by Duration ----------------
     if params.duration and params.duration != PostDuration.ALL_TIME:
@@ -271,7 +435,34 @@ async def fetch_posts_service(
             query["created_at"] = {"$gte": now - timedelta(days=30)}
 
     # ---------------- Filter by Source ----------------
-    if params.filter == PostFilter.FOLLOWING:
+    if (
+        params.filter == PostFilter.FOLLOWING
+        and params.sort_by in (None, PostSortBy.NEWEST)
+        and not params.search
+    ):
+        # Home feed is materialized per user on write, read it directly
+        await ensure_feed(saved_user)
+        try:
+            raw_posts, next_cursor = await fetch_feed_posts(
+                login_user_id, query, page, limit, params.cursor
+            )
+        except ValueError:
+            return create_exception_response(400, INVALID_DATA.format(data="cursor"))
+        total = await _lazy_posts_total(
+            login_user_id,
+            params,
+            lambda: count_feed_authors(login_user_id, query),
+        )
+        return create_success_response(
+            200,
+            FETCHED_SUCCESS.format(data="posts"),
+            results=await _format_posts_data(login_user_id, saved_user, raw_posts),
+            total=total,
+            page=page,
+            limit=limit,
+            next_cursor=next_cursor,
+        )
+    elif params.filter == PostFilter.FOLLOWING:
         followings = await users_connections_collection.find(
             {"follower_id": login_user_id}
         ).to_list(None)
@@ -294,34 +485,49 @@ async def fetch_posts_service(
         sort_field = "stats.hearts"
     elif params.sort_by == PostSortBy.MOST_COMMENTED:
         sort_field = "stats.comments"
+    elif params.sort_by == PostSortBy.RELEVANCE and params.search:
+        sort_field = "score"
 
     # ---------------- Aggregation Pipeline ----------------
     # 1. Match filters
     # 2. Sort by created_at DESC (to get latest for each user)
     # 3. Group by author.user_id, taking the $first (latest)
     # 4. Replace root to the latest post
-    # 5. Sort by requested sort_field
-    # 6. Pagination (skip/limit)
+    # 5. Keyset match after the cursor (when given). It has to follow the group:
+    #    matching posts before the cursor first would surface an older post of
+    #    an author whose latest one is already on a previous page
+    # 6. Sort by requested sort_field, _id as tie breaker
+    # 7. Pagination (cursor or skip, then limit)
 
-    pipeline = [
-        {"$match": query},
+    pipeline = [{"$match": query}]
+    if params.search:
+        pipeline.append({"$addFields": {"score": {"$meta": "textScore"}}})
+    pipeline += [
         {"$sort": {"created_at": -1}},
         {"$group": {"_id": "$author.user_id", "latest_post": {"$first": "$$ROOT"}}},
         {"$replaceRoot": {"newRoot": "$latest_post"}},
-        {"$sort": {sort_field: -1}},
-        {"$skip": (page - 1) * limit},
-        {"$limit": limit}
     ]
+    if params.cursor:
+        try:
+            pipeline.append({"$match": build_keyset_query(params.cursor, sort_field)})
+        except ValueError:
+            return create_exception_response(400, INVALID_DATA.format(data="cursor"))
+    pipeline.append({"$sort": {sort_field: -1, "_id": -1}})
+    if not params.cursor:
+        pipeline.append({"$skip": (page - 1) * limit})
+    pipeline.append({"$limit": limit})
 
     # Calculate total unique authors matching query
-    total_pipeline = [
-        {"$match": query},
-        {"$group": {"_id": "$author.user_id"}},
-        {"$count": "total"}
-    ]
-    
-    total_result = await posts_collection.aggregate(total_pipeline).to_list(None)
-    total = total_result[0]["total"] if total_result else 0
+    async def count_authors():
+        total_pipeline = [
+            {"$match": query},
+            {"$group": {"_id": "$author.user_id"}},
+            {"$count": "total"}
+        ]
+        total_result = await posts_collection.aggregate(total_pipeline).to_list(None)
+        return total_result[0]["total"] if total_result else 0
+
+    total = await _lazy_posts_total(login_user_id, params, count_authors)
 
     cursor = posts_collection.aggregate(pipeline)
     raw_posts = await cursor.to_list(length=limit)
@@ -334,9 +540,27 @@ async def fetch_posts_service(
         total=total,
         page=page,
         limit=limit,
+        next_cursor=build_next_cursor(raw_posts, limit, sort_field),
     )
     return response
 
+async def _lazy_posts_total(login_user_id: str, params: PostFilterParams, count):
+    """
+    Total for a feed listing, served from a per-filter TTL cache shared by
+    every page of the listing, so it is counted once per filter and TTL.
+    """
+    viewer_scoped = params.filter in (PostFilter.FOLLOWING, PostFilter.FOLLOWERS)
+    cache_key = (
+        login_user_id if viewer_scoped else None,
+        params.model_dump_json(exclude={"page", "limit", "cursor"}),
+    )
+    total = _posts_total_cache.get(cache_key)
+    if total is None:
+        total = await count()
+        _posts_total_cache[cache_key] = total
+    return total
+
+
 async def _format_posts_data(login_user_id: str, saved_user: dict, raw_posts: list):
     # ---------------- Fetch Related Data ----------------
     post_ids = [s["_id"] for s in raw_posts]
@@ -371,6 +595,13 @@ async def _format_posts_data(login_user_id: str, saved_user: dict, raw_posts: li
         ).to_list(None)
     }
 
+    # Batch fetch authors
+    authors = await fetch_authors_map(
+        post.get("author", {}).get("user_id", "")
+        for post in raw_posts
+        if not post.get("is_anonymous")
+    )
+
     # ---------------- Format Response ----------------
     posts = []
     for post in raw_posts:
@@ -385,7 +616,7 @@ async def _format_posts_data(login_user_id: str, saved_user: dict, raw_posts: li
         else:
             if post_user_id != saved_user.get("user_id", ""):
                 user_id = post_user_id
-                post_author = await users_collection.find_one({"user_id": user_id})
+                post_author = authors.get(user_id, {})
                 name = post_author.get("name", "Unknown")
                 username = post_author.get("username", "unknown")
                 avatar = post_author.get("avatar", "https://i.pravatar.cc/300?img=3")
@@ -418,7 +649,7 @@ async def _format_posts_data(login_user_id: str, saved_user: dict, raw_posts: li
                 "is_18_plus": post.get("is_18_plus", False),
                 "is_anonymous": post.get("is_anonymous", False),
                 "is_for_kids": post.get("is_for_kids", False),
-                "stats": post.get("stats", {}),
+                "stats": fold_stats(post["_id"], post.get("stats")),
                 "created_at_readable": convert_iso_date_to_humanize(
                     post.get("created_at")
                 ),
@@ -430,6 +661,7 @@ async def fetch_bookmarks_service(
     login_user_id: str,
     page: int = 1,
     limit: int = 10,
+    cursor: str = None,
 ):
     logger.info("content_service.fetch_bookmarks_service")
 
@@ -442,17 +674,24 @@ async def fetch_bookmarks_service(
     limit = max(limit, 1)
 
     # ---------------- Query Bookmarks ----------------
-    total = await posts_bookmarks_collection.count_documents({"user_id": login_user_id})
+    query = {"user_id": login_user_id}
+    total = await posts_bookmarks_collection.count_documents(query)
+
+    if cursor:
+        try:
+            query = apply_cursor(query, cursor, "bookmarked_at")
+        except ValueError:
+            return create_exception_response(400, INVALID_DATA.format(data="cursor"))
 
-    cursor = (
-        posts_bookmarks_collection.find({"user_id": login_user_id})
-        .sort("bookmarked_at", -1)
-        .skip((page - 1) * limit)
-        .limit(limit)
+    bookmarks_cursor = posts_bookmarks_collection.find(query).sort(
+        [("bookmarked_at", -1), ("_id", -1)]
     )
+    if not cursor:
+        bookmarks_cursor = bookmarks_cursor.skip((page - 1) * limit)
 
-    bookmarks = await cursor.to_list(length=limit)
+    bookmarks = await bookmarks_cursor.limit(limit).to_list(length=limit)
     post_ids = [b["post_id"] for b in bookmarks]
+    next_cursor = build_next_cursor(bookmarks, limit, "bookmarked_at")
 
     if not post_ids:
         return create_success_response(
@@ -478,6 +717,7 @@ async def fetch_bookmarks_service(
         total=total,
         page=page,
         limit=limit,
+        next_cursor=next_cursor,
     )
     return response
 
@@ -491,6 +731,7 @@ async def fetch_user_posts_service(
     search: str = None,
     page: int = 1,
     limit: int = 10,
+    cursor: str = None,
 ):
     logger.info("content_service.fetch_user_stories_service")
 
@@ -502,7 +743,7 @@ async def fetch_user_posts_service(
     # Determine whose stories we are fetching
     if user_id:
         is_draft = False  # Only public stories for other users
-        other_user = await users_collection.find_one({"user_id": user_id})
+        other_user = await get_user(user_id, IDENTITY)
         if not other_user:
             return create_exception_response(400, INVALID_DATA.format(data="user_id"))
     else:
@@ -517,21 +758,33 @@ async def fetch_user_posts_service(
         query["type"] = types
 
     if search:
-        query["$or"] = [
-            {"title": {"$regex": search, "$options": "i"}},
-            {"content": {"$regex": search, "$options": "i"}},
-        ]
+        query["$text"] = {"$search": search}
     total = await posts_collection.count_documents(query)
 
-    cursor = (
-        posts_collection.find(query)
-        .sort("created_at", -1)
-        .skip((page - 1) * limit)
-        .limit(limit)
+    if cursor:
+        try:
+            query = apply_cursor(query, cursor, "created_at")
+        except ValueError:
+            return create_exception_response(400, INVALID_DATA.format(data="cursor"))
+
+    posts_cursor = posts_collection.find(query).sort([("created_at", -1), ("_id", -1)])
+    if not cursor:
+        posts_cursor = posts_cursor.skip((page - 1) * limit)
+
+    raw_posts = await posts_cursor.limit(limit).to_list(length=limit)
+    next_cursor = build_next_cursor(raw_posts, limit, "created_at")
+
+    # Batch fetch authors
+    authors = await fetch_authors_map(
+        post["author"]["user_id"]
+        for post in raw_posts
+        if not post.get("is_anonymous")
     )
 
     posts = []
-    async for post in cursor:
+    for post in raw_posts:
+        # Include the deltas this worker has not flushed yet, like every other listing
+        post["stats"] = fold_stats(post["_id"], post.get("stats"))
         post["id"] = str(post.pop("_id"))
 
         if post.get("is_anonymous"):
@@ -547,7 +800,7 @@ async def fetch_user_posts_service(
             )
         else:
             author_id = post["author"]["user_id"]
-            author_user = await users_collection.find_one({"user_id": author_id}) or {}
+            author_user = authors.get(author_id, {})
             post["author"].update(
                 {
                     "name": author_user.get("username", "Unknown"),
@@ -566,6 +819,7 @@ async def fetch_user_posts_service(
         total=total,
         page=page,
         limit=limit,
+        next_cursor=next_cursor,
     )
     return response
 
@@ -659,10 +913,14 @@ async def save_post_service(
                 upsert=False,
             )
 
+            updated_post = {**existing_post, **update_fields}
             if is_transitioning_to_publish:
+                await submit_fan_out(updated_post)
                 points = await handle_publish_stats(obj_id, type, is_transition=True)
                 message = f"{type.value} published from draft successfully and earned {points} points"
             else:
+                if not existing_post.get("is_draft"):
+                    await sync_post_in_feeds(updated_post)
                 message = f"{type.value.capitalize()} updated successfully"
 
             status = 200
@@ -702,6 +960,7 @@ async def save_post_service(
                     {"$inc": {"total_drafts": 1}},
                 )
             else:
+                await submit_fan_out(content_data)
                 points = await handle_publish_stats(result.inserted_id, type)
                 message = (
                     f"{type.value.capitalize()} created successfully and earned {points} points"
@@ -737,6 +996,8 @@ async def delete_post_service(login_user_id: str, post_id: str):
 
     # Delete the post
     await posts_collection.delete_one({"_id": post_obj_id})
+    await remove_post_from_feeds(post_obj_id)
+    discard_stats(post_obj_id)
 
     if post.get("is_draft"):
         await users_collection.update_one(
@@ -786,6 +1047,37 @@ async def delete_post_service(login_user_id: str, post_id: str):
         await asyncio.gather(*delete_tasks)
     return create_success_response(200, "Post deleted successfully")
 
+async def _record_views(login_user_id: str, post_oids: list) -> set:
+    """
+    Upsert one posts_views row per (user, post) with a single unordered
+    bulk_write. Returns the posts viewed for the first time, whose view
+    counters are bumped through the write-behind buffer.
+    """
+    if not post_oids:
+        return set()
+    now = datetime.now(timezone.utc)
+    operations = [
+        UpdateOne(
+            {"user_id": login_user_id, "post_id": post_oid},
+            {"$setOnInsert": {"viewed_at": now}},
+            upsert=True,
+        )
+        for post_oid in post_oids
+    ]
+    try:
+        result = await posts_views_collection.bulk_write(operations, ordered=False)
+        upserted = result.upserted_ids.keys()
+    except BulkWriteError as e:
+        # A concurrent upsert of the same view loses on the unique index; it is not new
+        upserted = [item["index"] for item in e.details.get("upserted", [])]
+        logger.warning(f"⚠️ {len(e.details.get('writeErrors', []))} view upserts failed")
+
+    first_views = {post_oids[index] for index in upserted}
+    for post_oid in first_views:
+        increment_stat(post_oid, "views")
+    return first_views
+
+
 async def save_view_count_service(login_user_id: str, post_id: str):
     logger.info("content_service.save_view_count_service")
 
@@ -800,30 +1092,16 @@ async def save_view_count_service(login_user_id: str, post_id: str):
     except Exception:
         return create_exception_response(400, "Invalid post_id")
 
-    # Track whether user already viewed
-    insert_result = await posts_views_collection.update_one(
-        {"user_id": login_user_id, "post_id": post_oid},
-        {"$setOnInsert": {"viewed_at": datetime.now(timezone.utc)}},
-        upsert=True,
+    result = await posts_collection.find_one(
+        {"_id": post_oid}, {"stats.views": 1}  # projection to optimize
     )
-
-    if insert_result.upserted_id:
-        # First-time view → increment count
-        result = await posts_collection.find_one_and_update(
-            {"_id": post_oid},
-            {"$inc": {"stats.views": 1}},  # removed $setOnInsert
-            return_document=ReturnDocument.AFTER,
-        )
-    else:
-        # Already viewed → fetch existing
-        result = await posts_collection.find_one(
-            {"_id": post_oid}, {"stats.views": 1}  # projection to optimize
-        )
-
     if not result:
         return create_exception_response(404, NOT_FOUND.format(data="Post"))
 
-    total_views = result.get("stats", {}).get("views", 0)
+    # Track whether user already viewed
+    await _record_views(login_user_id, [post_oid])
+
+    total_views = fold_stats(post_oid, result.get("stats")).get("views", 0)
     return create_success_response(
         200,
         ACTION_SUCCESS.format(data="view count updated"),
@@ -831,6 +1109,45 @@ async def save_view_count_service(login_user_id: str, post_id: str):
     )
 
 
+async def save_view_counts_service(login_user_id: str, post_ids: list[str]):
+    logger.info("content_service.save_view_counts_service")
+
+    saved_user, error = await get_verified_user(login_user_id)
+    if error:
+        return error
+
+    # Dedupe while keeping the client's order; unknown ids are skipped, not fatal
+    post_oids = []
+    for post_id in dict.fromkeys(post_ids):
+        if ObjectId.is_valid(post_id):
+            post_oids.append(ObjectId(post_id))
+
+    posts = {
+        post["_id"]: post
+        async for post in posts_collection.find(
+            {"_id": {"$in": post_oids}}, {"stats.views": 1}
+        )
+    }
+    post_oids = [post_oid for post_oid in post_oids if post_oid in posts]
+
+    first_views = await _record_views(login_user_id, post_oids)
+
+    views = [
+        {
+            "post_id": str(post_oid),
+            "total": fold_stats(post_oid, posts[post_oid].get("stats")).get("views", 0),
+            "counted": post_oid in first_views,
+        }
+        for post_oid in post_oids
+    ]
+    return create_success_response(
+        200,
+        ACTION_SUCCESS.format(data="view counts updated"),
+        results=views,
+        total=len(first_views),
+    )
+
+
 async def toggle_bookmark_service(login_user_id: str, post_id: str):
     try:
         saved_user, error = await get_verified_user(login_user_id)
@@ -842,65 +1159,16 @@ async def toggle_bookmark_service(login_user_id: str, post_id: str):
         except Exception:
             return create_exception_response(400, "Invalid post_id")
 
-        # Try to insert bookmark first
-        insert_result = await posts_bookmarks_collection.update_one(
-            {"user_id": login_user_id, "post_id": post_oid},
-            {"$setOnInsert": {"bookmarked_at": datetime.now(timezone.utc)}},
-            upsert=True,
-        )
+        result = await posts_collection.find_one({"_id": post_oid}, {"stats.bookmarks": 1})
+        if not result:
+            return create_exception_response(404, NOT_FOUND.format(data="Post"))
 
-        if insert_result.upserted_id:
-            # Bookmark added
-            result = await posts_collection.find_one_and_update(
-                {"_id": post_oid},
-                {"$inc": {"stats.bookmarks": 1}},
-                return_document=ReturnDocument.AFTER,
-            )
-            # Increment user's total_bookmarks
-            await users_collection.update_one(
-                {"user_id": login_user_id},
-                {"$inc": {"total_bookmarks": 1}}
-            )
-            action = "added"
-        else:
-            # Already exists, remove
-            delete_result = await posts_bookmarks_collection.delete_one(
-                {"user_id": login_user_id, "post_id": post_oid}
-            )
-            if delete_result.deleted_count:
-                # Decrement safely using aggregation pipeline
-                result = await posts_collection.find_one_and_update(
-                    {"_id": post_oid},
-                    [
-                        {
-                            "$set": {
-                                "stats.bookmarks": {
-                                    "$max": [{"$subtract": ["$stats.bookmarks", 1]}, 0]
-                                }
-                            }
-                        }
-                    ],
-                    return_document=ReturnDocument.AFTER,
-                )
-                # Decrement user's total_bookmarks
-                await users_collection.update_one(
-                    {"user_id": login_user_id},
-                    [
-                        {
-                            "$set": {
-                                "total_bookmarks": {
-                                    "$max": [{"$subtract": ["$total_bookmarks", 1]}, 0]
-                                }
-                            }
-                        }
-                    ]
-                )
-                action = "removed"
-            else:
-                # Something went wrong
-                return create_exception_response(500, "Failed to toggle bookmark")
+        added = await flip(BOOKMARK, login_user_id, post_oid)
+        if added is None:
+            return create_exception_response(500, "Failed to toggle bookmark")
+        action = "added" if added else "removed"
 
-        total_bookmarks = result.get("stats", {}).get("bookmarks", 0)
+        total_bookmarks = fold_stats(post_oid, result.get("stats")).get("bookmarks", 0)
         return create_success_response(
             200,
             ACTION_SUCCESS.format(data=f"Bookmark {action}"),
@@ -927,117 +1195,28 @@ async def toggle_heart_service(login_user_id: str, post_id: str):
         except Exception:
             return create_exception_response(400, "Invalid post_id")
 
-        # Try to add heart atomically
-        insert_result = await posts_hearts_collection.update_one(
-            {"user_id": login_user_id, "post_id": post_oid},
-            {"$setOnInsert": {"hearted_at": datetime.now(timezone.utc)}},
-            upsert=True,
+        result = await posts_collection.find_one(
+            {"_id": post_oid}, {"stats.hearts": 1, "author.user_id": 1}
         )
-
-        if insert_result.upserted_id:
-            # Heart added
-            result = await posts_collection.find_one_and_update(
-                {"_id": post_oid},
-                {"$inc": {"stats.hearts": 1}},
-                return_document=ReturnDocument.AFTER,
-            )
-            # Reward points
-            points = 5
-            now = datetime.now(timezone.utc)
-            await points_collection.insert_one(
-                {
-                    "user_id": login_user_id,
-                    "post_id": post_oid,
-                    "type": "earned",
-                    "icon": "❤️",
-                    "points": points,
-                    "reason": "Hearted post",
-                    "created_at": now,
-                }
-            )
-            await users_collection.update_one(
-                {"user_id": login_user_id},
-                {"$inc": {"total_points": points}},
-            )
-            # Add notification
-            post_owner_id = result.get("author", {}).get("user_id")
-            if post_owner_id and post_owner_id != login_user_id:
-                notification_data = {
-                    "user_id": post_owner_id,
-                    "actor_id": login_user_id,
-                    "post_id": post_oid,
-                    "type": "heart",
-                    "message": f"{saved_user.get('name', 'Someone')} hearted your post",
-                    "is_read": False,
-                    "created_at": now,
-                }
-                await user_notifications_collection.insert_one(notification_data)
-                # Push notification via WebSocket
-                await notification_manager.send_personal_notification(
-                    post_owner_id, 
-                    {
-                        "type": "heart",
-                        "message": notification_data["message"],
-                        "actor": {
-                            "user_id": login_user_id,
-                            "name": saved_user.get('name', 'Someone'),
-                            "avatar": saved_user.get('avatar', 'https://i.pravatar.cc/300?img=3'),
-                        },
-                        "post_id": str(post_oid),
-                        "created_at": now.isoformat()
-                    }
-                )
-            action = "added"
-        else:
-            # Already exists, remove heart
-            delete_result = await posts_hearts_collection.delete_one(
-                {"user_id": login_user_id, "post_id": post_oid}
-            )
-            if delete_result.deleted_count:
-                # Decrement safely using aggregation pipeline
-                result = await posts_collection.find_one_and_update(
-                    {"_id": post_oid},
-                    [
-                        {
-                            "$set": {
-                                "stats.hearts": {
-                                    "$max": [{"$subtract": ["$stats.hearts", 1]}, 0]
-                                }
-                            }
-                        }
-                    ],
-                    return_document=ReturnDocument.AFTER,
-                )
-                # Deduct points
-                points = 5
-                await points_collection.delete_one(
-                    {
-                        "user_id": login_user_id,
-                        "post_id": post_oid,
-                        "reason": "Hearted post",
-                    }
-                )
-                await users_collection.update_one(
-                    {"user_id": login_user_id},
-                    [
-                        {
-                            "$set": {
-                                "total_points": {
-                                    "$max": [{"$subtract": ["$total_points", points]}, 0]
-                                }
-                            }
-                        }
-                    ],
-                )
-                action = "removed"
-            else:
-                return create_exception_response(500, "Failed to toggle heart")
-
         if not result:
             logger.warning(f"Post not found: {post_id}")
             return create_exception_response(404, NOT_FOUND.format(data="Post"))
 
-        total_hearts = result.get("stats", {}).get("hearts", 0)
+        added = await flip(HEART, login_user_id, post_oid)
+        if added is None:
+            return create_exception_response(500, "Failed to toggle heart")
+        if added:
+            await notify_user(
+                result.get("author", {}).get("user_id"),
+                saved_user,
+                "heart",
+                f"{saved_user.get('name', 'Someone')} hearted your post",
+                datetime.now(timezone.utc),
+                post_id=post_oid,
+            )
+        action = "added" if added else "removed"
+
+        total_hearts = fold_stats(post_oid, result.get("stats")).get("hearts", 0)
 
         return create_success_response(
             200,
@@ -1051,7 +1230,7 @@ async def toggle_heart_service(login_user_id: str, post_id: str):
 
 
 async def fetch_heart_service(
-    login_user_id: str, post_id: str, page: int = 1, limit: int = 10
+    login_user_id: str, post_id: str, page: int = 1, limit: int = 10, cursor: str = None
 ):
     logger.info("content_service.fetch_heart_service")
     try:
@@ -1075,14 +1254,20 @@ async def fetch_heart_service(
         )
 
         # Fetch hearts
-        cursor = (
-            posts_hearts_collection.find({"post_id": post_oid})
-            .sort("hearted_at", -1)
-            .skip((page - 1) * limit)
-            .limit(limit)
+        query = {"post_id": post_oid}
+        if cursor:
+            try:
+                query = apply_cursor(query, cursor, "hearted_at")
+            except ValueError:
+                return create_exception_response(400, INVALID_DATA.format(data="cursor"))
+
+        hearts_cursor = posts_hearts_collection.find(query).sort(
+            [("hearted_at", -1), ("_id", -1)]
         )
+        if not cursor:
+            hearts_cursor = hearts_cursor.skip((page - 1) * limit)
 
-        raw_hearts = await cursor.to_list(length=limit)
+        raw_hearts = await hearts_cursor.limit(limit).to_list(length=limit)
 
         post_user_ids = [s["user_id"] for s in raw_hearts]
 
@@ -1095,8 +1280,7 @@ async def fetch_heart_service(
         }
 
         # Batch fetch users
-        users_cursor = users_collection.find({"user_id": {"$in": post_user_ids}})
-        users_map = {u["user_id"]: u async for u in users_cursor}
+        users_map = await fetch_authors_map(post_user_ids)
 
         hearts = []
         for heart in raw_hearts:
@@ -1125,13 +1309,14 @@ async def fetch_heart_service(
             total=total_hearts,
             page=page,
             limit=limit,
+            next_cursor=build_next_cursor(raw_hearts, limit, "hearted_at"),
         )
     except Exception as e:
         logger.exception("Error in fetch_heart_service")
         return create_exception_response(500, f"An unexpected error occurred: {str(e)}")
 
 async def fetch_comments_service(
-    login_user_id: str, post_id: str, page: int = 1, limit: int = 10
+    login_user_id: str, post_id: str, page: int = 1, limit: int = 10, cursor: str = None
 ):
     logger.info("content_service.fetch_comments_service")
     try:
@@ -1155,19 +1340,24 @@ async def fetch_comments_service(
         )
 
         # Fetch paginated comments
-        cursor = (
-            posts_comments_collection.find({"post_id": post_oid})
-            .sort("created_at", -1)
-            .skip((page - 1) * limit)
-            .limit(limit)
+        query = {"post_id": post_oid}
+        if cursor:
+            try:
+                query = apply_cursor(query, cursor, "created_at")
+            except ValueError:
+                return create_exception_response(400, INVALID_DATA.format(data="cursor"))
+
+        comments_cursor = posts_comments_collection.find(query).sort(
+            [("created_at", -1), ("_id", -1)]
         )
+        if not cursor:
+            comments_cursor = comments_cursor.skip((page - 1) * limit)
 
-        raw_comments = await cursor.to_list(length=limit)
+        raw_comments = await comments_cursor.limit(limit).to_list(length=limit)
         comment_user_ids = [c["user_id"] for c in raw_comments]
 
         # Batch fetch users
-        users_cursor = users_collection.find({"user_id": {"$in": comment_user_ids}})
-        users_map = {u["user_id"]: u async for u in users_cursor}
+        users_map = await fetch_authors_map(comment_user_ids)
 
         comments = []
         for comment in raw_comments:
@@ -1197,6 +1387,7 @@ async def fetch_comments_service(
             total=total_comments,
             page=page,
             limit=limit,
+            next_cursor=build_next_cursor(raw_comments, limit, "created_at"),
         )
 
     except Exception as e:
@@ -1233,63 +1424,41 @@ async def save_comment_service(login_user_id: str, post_id: str, comment_text: s
         comment_data["_id"] = result.inserted_id
 
         # Increment comments count in post (nested inside stats)
-        result = await posts_collection.find_one_and_update(
-            {"_id": post_oid},
-            {"$inc": {"stats.comments": 1}},  # 👈 update nested field
-            return_document=ReturnDocument.AFTER,
-        )
+        increment_stat(post_oid, "comments")
         points = 10
-        points_collection.insert_one(
-            {
-                "user_id": login_user_id,
-                "post_id": post_oid,
-                "source_id": comment_data["_id"],
-                "type": "earned",
-                "icon": "💬",
-                "points": points,
-                "reason": f"Posted comment",
-                "created_at": now,
-            }
-        )
-        await users_collection.update_one(
-            {"user_id": login_user_id},
-            {"$inc": {"total_points": points}},
-        )
-        # Add notification
-        post_owner_id = post.get("author", {}).get("user_id")
-        if post_owner_id and post_owner_id != login_user_id:
-            notification_data = {
-                "user_id": post_owner_id,
-                "actor_id": login_user_id,
-                "post_id": post_oid,
-                "comment_id": comment_data["_id"],
-                "type": "comment",
-                "message": f"{saved_user.get('name', 'Someone')} commented on your post",
-                "is_read": False,
-                "created_at": now,
-            }
-            await user_notifications_collection.insert_one(notification_data)
-            # Push notification via WebSocket
-            await notification_manager.send_personal_notification(
-                post_owner_id,
+        await asyncio.gather(
+            points_collection.insert_one(
                 {
-                    "type": "comment",
-                    "message": notification_data["message"],
-                    "actor": {
-                        "user_id": login_user_id,
-                        "name": saved_user.get('name', 'Someone'),
-                        "avatar": saved_user.get('avatar', 'https://i.pravatar.cc/300?img=3'),
-                    },
-                    "post_id": str(post_oid),
-                    "comment_id": str(comment_data["_id"]),
-                    "created_at": now.isoformat()
+                    "user_id": login_user_id,
+                    "post_id": post_oid,
+                    "source_id": comment_data["_id"],
+                    "type": "earned",
+                    "icon": "💬",
+                    "points": points,
+                    "reason": f"Posted comment",
+                    "created_at": now,
                 }
-            )
+            ),
+            users_collection.update_one(
+                {"user_id": login_user_id},
+                {"$inc": {"total_points": points}},
+            ),
+        )
+        # Add notification
+        await notify_user(
+            post.get("author", {}).get("user_id"),
+            saved_user,
+            "comment",
+            f"{saved_user.get('name', 'Someone')} commented on your post",
+            now,
+            post_id=post_oid,
+            comment_id=comment_data["_id"],
+        )
 
         return create_success_response(
             200,
             ACTION_SUCCESS.format(data="Comment added"),
-            total=result.get("stats", {}).get("comments", 0),  # 👈 nested access
+            total=fold_stats(post_oid, post.get("stats")).get("comments", 0),
             result={
                 "comment_id": str(comment_data["_id"]),
                 "user_id": comment_data["user_id"],
@@ -1333,46 +1502,29 @@ async def delete_comment_service(login_user_id: str, comment_id: str):
         await posts_comments_collection.delete_one({"_id": comment_oid})
 
         # Decrement comments count in the post
-        result = await posts_collection.find_one_and_update(
-            {"_id": post_oid},
-            [
-                {
-                    "$set": {
-                        "stats.comments": {
-                            "$max": [{"$subtract": ["$stats.comments", 1]}, 0]
-                        }
-                    }
-                }
-            ],
-            return_document=ReturnDocument.AFTER,
-        )
+        increment_stat(post_oid, "comments", -1)
 
         # Deduct points from user
         points = 10
-        await points_collection.delete_one(
-            {
-                "user_id": login_user_id,
-                "post_id": post_oid,
-                "source_id": comment_oid,
-            }
-        )
-        await users_collection.update_one(
-            {"user_id": login_user_id},
-            [
+        post, _, _ = await asyncio.gather(
+            posts_collection.find_one({"_id": post_oid}, {"stats.comments": 1}),
+            points_collection.delete_one(
                 {
-                    "$set": {
-                        "total_points": {
-                            "$max": [{"$subtract": ["$total_points", points]}, 0]
-                        }
-                    }
+                    "user_id": login_user_id,
+                    "post_id": post_oid,
+                    "source_id": comment_oid,
                 }
-            ],
+            ),
+            users_collection.update_one(
+                {"user_id": login_user_id}, clamped_inc({"total_points": -points})
+            ),
         )
 
         return create_success_response(
             200,
             ACTION_SUCCESS.format(data="Comment deleted"),
-            total=result.get("stats", {}).get("comments", 0),
+            total=fold_stats(post_oid, (post or {}).get("stats")).get("comments", 0),
+            result={"post_id": str(post_oid)},
         )
 
     except Exception as e:
@@ -1384,6 +1536,7 @@ async def fetch_user_notifications_service(
     login_user_id: str,
     page: int = 1,
     limit: int = 10,
+    cursor: str = None,
 ):
     logger.info("content_service.fetch_user_notifications_service")
     try:
@@ -1397,19 +1550,24 @@ async def fetch_user_notifications_service(
         query = {"user_id": login_user_id}
         total = await user_notifications_collection.count_documents(query)
 
-        cursor = (
-            user_notifications_collection.find(query)
-            .sort("created_at", -1)
-            .skip((page - 1) * limit)
-            .limit(limit)
+        if cursor:
+            try:
+                query = apply_cursor(query, cursor, "created_at")
+            except ValueError:
+                return create_exception_response(400, INVALID_DATA.format(data="cursor"))
+
+        notifications_cursor = user_notifications_collection.find(query).sort(
+            [("created_at", -1), ("_id", -1)]
         )
+        if not cursor:
+            notifications_cursor = notifications_cursor.skip((page - 1) * limit)
 
-        raw_notifications = await cursor.to_list(length=limit)
+        raw_notifications = await notifications_cursor.limit(limit).to_list(length=limit)
 
         actor_ids = list(set(doc.get("actor_id") for doc in raw_notifications if doc.get("actor_id")))
         post_ids = list(set(doc.get("post_id") for doc in raw_notifications if doc.get("post_id")))
 
-        actors = {u["user_id"]: u async for u in users_collection.find({"user_id": {"$in": actor_ids}})}
+        actors = await fetch_authors_map(actor_ids)
         posts = {p["_id"]: p async for p in posts_collection.find({"_id": {"$in": post_ids}})}
 
         results = []
@@ -1446,6 +1604,7 @@ async def fetch_user_notifications_service(
             total=total,
             page=page,
             limit=limit,
+            next_cursor=build_next_cursor(raw_notifications, limit, "created_at"),
         )
     except Exception as e:
         logger.exception("Error in fetch_user_notifications_service")
@@ -0,0 +1,123 @@
+"""
+Write-behind counters for post stats.
+
+Hearts, views, bookmarks and comments used to `$inc` the post document on every
+action, which turns a trending post into a single-document write hotspot.
+Increments are buffered per process instead and flushed by the counter worker
+as one aggregated update per post every `settings.counter_flush_ms`. Reads
+fold this worker's unflushed deltas back in with `fold_stats`.
+"""
+import asyncio
+import logging
+from collections import defaultdict
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from app.config.database.mongo import posts_collection
+from app.utils.cache_manager import cache_manager
+
+logger = logging.getLogger("uvicorn")
+
+# post_id -> {stat: delta} not written to Mongo yet
+_pending = defaultdict(lambda: defaultdict(int))
+# Deltas of the flush in progress, still folded into reads until it lands
+_flushing = {}
+# Posts deleted while their deltas were in flight, never restored on failure
+_discarded = set()
+_flush_lock = asyncio.Lock()
+
+
+def increment_stat(post_id, stat: str, delta: int = 1):
+    _pending[post_id][stat] += delta
+
+
+def fold_stats(post_id, stats: dict = None) -> dict:
+    """`stats` of a post document with the unflushed deltas applied."""
+    stats = dict(stats or {})
+    for buffer in (_flushing, _pending):
+        for stat, delta in buffer.get(post_id, {}).items():
+            stats[stat] = max(stats.get(stat, 0) + delta, 0)
+    return stats
+
+
+def discard_stats(post_id):
+    """Forget the buffered deltas of a deleted post."""
+    _pending.pop(post_id, None)
+    if _flushing.pop(post_id, None) is not None:
+        _discarded.add(post_id)
+
+
+def _stats_update(deltas: dict) -> list:
+    # Pipeline update so counters never drop below zero, as the toggles always ensured
+    return [
+        {
+            "$set": {
+                f"stats.{stat}": {
+                    "$max": [{"$add": [{"$ifNull": [f"$stats.{stat}", 0]}, delta]}, 0]
+                }
+                for stat, delta in deltas.items()
+            }
+        }
+    ]
+
+
+def _restore(batch: list):
+    for post_id, deltas in batch:
+        if post_id in _discarded:
+            continue
+        for stat, delta in deltas.items():
+            _pending[post_id][stat] += delta
+
+
+async def _flush() -> int:
+    global _pending, _flushing
+    if not _pending:
+        return 0
+    pending, _pending = _pending, defaultdict(lambda: defaultdict(int))
+
+    batch = [
+        (post_id, {stat: delta for stat, delta in deltas.items() if delta})
+        for post_id, deltas in pending.items()
+    ]
+    batch = [(post_id, deltas) for post_id, deltas in batch if deltas]
+    if not batch:
+        return 0
+
+    _flushing = pending
+    operations = [
+        UpdateOne({"_id": post_id}, _stats_update(deltas)) for post_id, deltas in batch
+    ]
+    flushed = [post_id for post_id, _ in batch]
+    try:
+        await posts_collection.bulk_write(operations, ordered=False)
+    except BulkWriteError as e:
+        # Retry only the updates that failed; the rest are applied
+        failed = {error["index"] for error in e.details.get("writeErrors", [])}
+        _restore([batch[index] for index in failed])
+        flushed = [post_id for index, (post_id, _) in enumerate(batch) if index not in failed]
+        logger.error(f"❌ Failed to flush {len(failed)} post counters: {e}")
+    except Exception as e:
+        _restore(batch)
+        flushed = []
+        logger.error(f"❌ Failed to flush post counters: {e}")
+    except BaseException:
+        # Cancelled mid-write (shutdown): keep the deltas for the final flush
+        _restore(batch)
+        raise
+    finally:
+        _flushing = {}
+        _discarded.clear()
+
+    # Renderings cached while the deltas were buffered carry the old stats
+    if flushed:
+        await cache_manager.invalidate([f"post:{post_id}" for post_id in flushed])
+    return len(flushed)
+
+
+async def flush_stats() -> int:
+    """
+    Write every buffered delta with one unordered bulk_write. Returns posts
+    updated. Flushes are serialized, so a flush called while another is in
+    flight (e.g. on shutdown) waits for it and then writes what is left.
+    """
+    async with _flush_lock:
+        return await _flush()
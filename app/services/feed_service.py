@@ -0,0 +1,370 @@
+import logging
+from datetime import datetime, timezone
+from pymongo import DeleteOne, ReplaceOne, UpdateOne
+from app.queue.jobs import job_queue
+from app.utils.cache_manager import cache_manager
+from app.utils.methods import apply_cursor, build_keyset_query, build_next_cursor
+from app.config.database.mongo import (
+    posts_collection,
+    users_collection,
+    users_feeds_collection,
+    users_feed_heads_collection,
+    users_connections_collection,
+)
+
+logger = logging.getLogger("uvicorn")
+
+# Post attributes copied into every feed entry so the following feed can be
+# filtered without touching the posts collection.
+FEED_POST_FIELDS = ("type", "theme", "tags", "is_18_plus", "is_anonymous", "is_for_kids")
+
+# How many of an author's latest posts are copied into a follower's feed
+# when the follow happens (or when a feed is built for the first time).
+FEED_BACKFILL_LIMIT = 100
+FEED_REBUILD_LIMIT = 1000
+
+FEED_WRITE_BATCH = 500
+
+FAN_OUT_JOB = "feed_fan_out"
+
+# Filters a feed head can answer: the latest post of an author is kept per
+# (user_id, author_id, is_18_plus), and a `created_at` bound holds for the
+# latest post exactly when the author has a matching post at all. Any other
+# post attribute filter needs the per-post entries.
+FEED_HEAD_FIELDS = ("is_18_plus", "created_at")
+
+
+def _feed_query(user_id: str, query: dict) -> dict:
+    feed_query = {
+        key: value
+        for key, value in query.items()
+        if key not in ("is_draft", "author.user_id")
+    }
+    feed_query["user_id"] = user_id
+    return feed_query
+
+
+def _feed_entry(post: dict) -> dict:
+    entry = {field: post.get(field) for field in FEED_POST_FIELDS}
+    entry["author_id"] = post.get("author", {}).get("user_id")
+    entry["created_at"] = post.get("created_at")
+    return entry
+
+
+def _head_update(user_id: str, post: dict) -> UpdateOne:
+    """Make `post` the head of its author in the feed of `user_id` unless a newer one is"""
+    entry = _feed_entry(post)
+    # A missing head compares lower than any date
+    newer = {"$gt": [entry["created_at"], "$created_at"]}
+    return UpdateOne(
+        {
+            "user_id": user_id,
+            "author_id": entry["author_id"],
+            "is_18_plus": entry["is_18_plus"],
+        },
+        [
+            {
+                "$set": {
+                    "post_id": {"$cond": [newer, post["_id"], "$post_id"]},
+                    "created_at": {"$cond": [newer, entry["created_at"], "$created_at"]},
+                }
+            }
+        ],
+        upsert=True,
+    )
+
+
+async def _upsert_feed_entries(operations: list, head_operations: list = None):
+    if operations:
+        await users_feeds_collection.bulk_write(operations, ordered=False)
+    if head_operations:
+        await users_feed_heads_collection.bulk_write(head_operations, ordered=False)
+
+
+async def _refresh_feed_heads(match: dict):
+    """Recompute, from the feed entries matching `match`, the heads they make up"""
+    latest = await users_feeds_collection.aggregate(
+        [
+            {"$match": match},
+            {"$sort": {"created_at": -1, "post_id": -1}},
+            {
+                "$group": {
+                    "_id": {
+                        "user_id": "$user_id",
+                        "author_id": "$author_id",
+                        "is_18_plus": "$is_18_plus",
+                    },
+                    "post_id": {"$first": "$post_id"},
+                    "created_at": {"$first": "$created_at"},
+                }
+            },
+        ]
+    ).to_list(None)
+    heads = {
+        (h["_id"]["user_id"], h["_id"]["author_id"], h["_id"].get("is_18_plus")): h
+        for h in latest
+    }
+    stale = await users_feed_heads_collection.find(
+        match, {"user_id": 1, "author_id": 1, "is_18_plus": 1}
+    ).to_list(None)
+
+    operations = [
+        ReplaceOne(
+            head["_id"],
+            {**head["_id"], "post_id": head["post_id"], "created_at": head["created_at"]},
+            upsert=True,
+        )
+        for head in heads.values()
+    ]
+    operations += [
+        DeleteOne({"_id": head["_id"]})
+        for head in stale
+        if (head["user_id"], head["author_id"], head.get("is_18_plus")) not in heads
+    ]
+    for start in range(0, len(operations), FEED_WRITE_BATCH):
+        await users_feed_heads_collection.bulk_write(
+            operations[start : start + FEED_WRITE_BATCH], ordered=False
+        )
+
+
+async def _refresh_author_heads(user_ids: list, author_id: str):
+    for start in range(0, len(user_ids), FEED_WRITE_BATCH):
+        await _refresh_feed_heads(
+            {
+                "user_id": {"$in": user_ids[start : start + FEED_WRITE_BATCH]},
+                "author_id": author_id,
+            }
+        )
+
+
+async def fan_out_post(post: dict):
+    """Write a freshly published post into the feed of every follower of its author."""
+    logger.info("feed_service.fan_out_post")
+
+    author_id = post.get("author", {}).get("user_id")
+    entry = _feed_entry(post)
+    operations, head_operations = [], []
+    async for connection in users_connections_collection.find(
+        {"following_id": author_id}, {"follower_id": 1}
+    ):
+        operations.append(
+            UpdateOne(
+                {"user_id": connection["follower_id"], "post_id": post["_id"]},
+                {"$set": entry},
+                upsert=True,
+            )
+        )
+        head_operations.append(_head_update(connection["follower_id"], post))
+        if len(operations) >= FEED_WRITE_BATCH:
+            await _upsert_feed_entries(operations, head_operations)
+            operations, head_operations = [], []
+    await _upsert_feed_entries(operations, head_operations)
+
+
+async def submit_fan_out(post: dict):
+    """
+    Queue the fan-out of a freshly published post; the job worker writes it
+    into the follower feeds after the request has returned.
+    """
+    if not await job_queue.submit(FAN_OUT_JOB, post["_id"]):
+        # Dropped under backpressure: a missing feed entry is not recoverable
+        await fan_out_post(post)
+        await cache_manager.invalidate(["posts"])
+
+
+async def _fan_out_posts(post_ids: list):
+    # Read the posts again: they may have been edited, unpublished or deleted
+    # while the job was queued
+    async for post in posts_collection.find({"_id": {"$in": post_ids}, "is_draft": False}):
+        await fan_out_post(post)
+    # Listings cached before the feeds were written miss the new posts. Edits
+    # and unpublishing are covered by the post:<id> tag of cached listings
+    await cache_manager.invalidate(["posts"])
+
+
+job_queue.register(FAN_OUT_JOB, _fan_out_posts)
+
+
+async def sync_post_in_feeds(post: dict):
+    """Refresh the copied attributes of an edited post, or drop it if it went back to draft."""
+    if post.get("is_draft"):
+        await remove_post_from_feeds(post["_id"])
+        return
+    await users_feeds_collection.update_many(
+        {"post_id": post["_id"]}, {"$set": _feed_entry(post)}
+    )
+    # An edit can move the post to the other is_18_plus head
+    user_ids = await users_feeds_collection.distinct("user_id", {"post_id": post["_id"]})
+    await _refresh_author_heads(user_ids, post.get("author", {}).get("user_id"))
+
+
+async def remove_post_from_feeds(post_id):
+    heads = await users_feed_heads_collection.find(
+        {"post_id": post_id}, {"user_id": 1, "author_id": 1}
+    ).to_list(None)
+    await users_feeds_collection.delete_many({"post_id": post_id})
+    if heads:
+        # Only the feeds where it was the latest post of its author change head
+        await _refresh_author_heads(
+            [h["user_id"] for h in heads], heads[0]["author_id"]
+        )
+
+
+async def _copy_posts_into_feed(user_id: str, query: dict, limit: int):
+    operations, head_operations = [], []
+    async for post in (
+        posts_collection.find(query).sort("created_at", -1).limit(limit)
+    ):
+        operations.append(
+            UpdateOne(
+                {"user_id": user_id, "post_id": post["_id"]},
+                {"$set": _feed_entry(post)},
+                upsert=True,
+            )
+        )
+        head_operations.append(_head_update(user_id, post))
+        if len(operations) >= FEED_WRITE_BATCH:
+            await _upsert_feed_entries(operations, head_operations)
+            operations, head_operations = [], []
+    await _upsert_feed_entries(operations, head_operations)
+
+
+async def backfill_feed(follower_id: str, author_id: str):
+    """Copy the latest posts of a newly followed author into the follower's feed."""
+    logger.info("feed_service.backfill_feed")
+    await _copy_posts_into_feed(
+        follower_id,
+        {"author.user_id": author_id, "is_draft": False},
+        FEED_BACKFILL_LIMIT,
+    )
+
+
+async def trim_feed(follower_id: str, author_id: str):
+    """Remove every post of an unfollowed author from the follower's feed."""
+    logger.info("feed_service.trim_feed")
+    await users_feeds_collection.delete_many(
+        {"user_id": follower_id, "author_id": author_id}
+    )
+    await users_feed_heads_collection.delete_many(
+        {"user_id": follower_id, "author_id": author_id}
+    )
+
+
+async def ensure_feed(saved_user: dict):
+    """
+    Build the feed of users who followed people before feeds were materialized,
+    and the author heads of feeds built before heads existed.
+    Runs once per user; afterwards the write paths keep the feed up to date.
+    """
+    if saved_user.get("feed_heads_built_at"):
+        return
+
+    logger.info("feed_service.ensure_feed")
+    user_id = saved_user["user_id"]
+    now = datetime.now(timezone.utc)
+    if saved_user.get("feed_built_at"):
+        await _refresh_feed_heads({"user_id": user_id})
+        await users_collection.update_one(
+            {"user_id": user_id}, {"$set": {"feed_heads_built_at": now}}
+        )
+        return
+
+    following_ids = [
+        f["following_id"]
+        for f in await users_connections_collection.find(
+            {"follower_id": user_id}, {"following_id": 1}
+        ).to_list(None)
+    ]
+    if following_ids:
+        await _copy_posts_into_feed(
+            user_id,
+            {"author.user_id": {"$in": following_ids}, "is_draft": False},
+            FEED_REBUILD_LIMIT,
+        )
+    await users_collection.update_one(
+        {"user_id": user_id},
+        {"$set": {"feed_built_at": now, "feed_heads_built_at": now}},
+    )
+
+
+def _reads_heads(query: dict) -> bool:
+    return all(
+        key in FEED_HEAD_FIELDS or key in ("is_draft", "author.user_id")
+        for key in query
+    )
+
+
+async def fetch_feed_posts(
+    user_id: str, query: dict, page: int, limit: int, cursor: str = None
+):
+    """
+    Read the following feed of `user_id` from its materialized entries.
+    `query` is the posts filter built by fetch_posts_service; feed entries carry
+    the same field names so it applies unchanged.
+    Returns the latest post of each followed author, newest first, and the
+    cursor of the next page. The cursor is taken from the feed entries, so a
+    post deleted since it was fanned out does not end the listing early.
+    Raises ValueError for an invalid cursor.
+    """
+    feed_query = _feed_query(user_id, query)
+    if _reads_heads(query):
+        # One head per followed author: a sorted index scan
+        if cursor:
+            feed_query = apply_cursor(feed_query, cursor, "created_at", id_field="post_id")
+        find = users_feed_heads_collection.find(
+            feed_query, {"post_id": 1, "created_at": 1}
+        ).sort(
+            [("created_at", -1), ("post_id", -1)]
+        )
+        if not cursor:
+            find = find.skip((page - 1) * limit)
+        entries = await find.limit(limit).to_list(length=limit)
+    else:
+        # The keyset bound applies to each author's latest entry, so it can
+        # only be matched after the group
+        pipeline = [
+            {"$match": feed_query},
+            {"$sort": {"created_at": -1}},
+            {
+                "$group": {
+                    "_id": "$author_id",
+                    "post_id": {"$first": "$post_id"},
+                    "created_at": {"$first": "$created_at"},
+                }
+            },
+        ]
+        if cursor:
+            pipeline.append(
+                {"$match": build_keyset_query(cursor, "created_at", id_field="post_id")}
+            )
+        pipeline.append({"$sort": {"created_at": -1, "post_id": -1}})
+        if not cursor:
+            pipeline.append({"$skip": (page - 1) * limit})
+        pipeline.append({"$limit": limit})
+        entries = await users_feeds_collection.aggregate(pipeline).to_list(length=limit)
+
+    next_cursor = build_next_cursor(entries, limit, "created_at", id_field="post_id")
+    post_ids = [e["post_id"] for e in entries]
+    if not post_ids:
+        return [], next_cursor
+
+    posts_map = {
+        p["_id"]: p
+        for p in await posts_collection.find({"_id": {"$in": post_ids}}).to_list(None)
+    }
+    return [posts_map[pid] for pid in post_ids if pid in posts_map], next_cursor
+
+
+async def count_feed_authors(user_id: str, query: dict) -> int:
+    """Number of distinct followed authors in the feed of `user_id` matching `query`."""
+    if _reads_heads(query):
+        return await users_feed_heads_collection.count_documents(
+            _feed_query(user_id, query)
+        )
+    total_pipeline = [
+        {"$match": _feed_query(user_id, query)},
+        {"$group": {"_id": "$author_id"}},
+        {"$count": "total"},
+    ]
+    total_result = await users_feeds_collection.aggregate(total_pipeline).to_list(None)
+    return total_result[0]["total"] if total_result else 0
@@ -0,0 +1,69 @@
+import logging
+from datetime import datetime
+from pymongo.errors import BulkWriteError
+from app.config.database.mongo import user_notifications_collection
+from app.queue.jobs import job_queue
+from app.utils.notification_bus import notification_bus
+
+logger = logging.getLogger("uvicorn")
+
+NOTIFICATION_JOB = "notification"
+
+
+async def notify_user(
+    recipient_id: str,
+    actor: dict,
+    type: str,
+    message: str,
+    now: datetime,
+    post_id=None,
+    **refs,
+):
+    """
+    Queue a notification from `actor` to `recipient_id`. It is stored and
+    pushed over WebSocket by the job worker, after the request has returned.
+    """
+    if not recipient_id or recipient_id == actor["user_id"]:
+        return
+    if post_id is not None:
+        refs = {"post_id": post_id, **refs}
+    notification_data = {
+        "user_id": recipient_id,
+        "actor_id": actor["user_id"],
+        **refs,
+        "type": type,
+        "message": message,
+        "is_read": False,
+        "created_at": now,
+    }
+    push_data = {
+        "type": type,
+        "message": message,
+        "actor": {
+            "user_id": actor["user_id"],
+            "name": actor.get("name", "Someone"),
+            "avatar": actor.get("avatar", "https://i.pravatar.cc/300?img=3"),
+        },
+        **{field: str(value) for field, value in refs.items()},
+        "created_at": now.isoformat(),
+    }
+    await job_queue.submit(NOTIFICATION_JOB, (notification_data, push_data))
+
+
+async def _store_and_push(batch: list):
+    try:
+        await user_notifications_collection.insert_many(
+            [notification_data for notification_data, _ in batch], ordered=False
+        )
+    except BulkWriteError as e:
+        # Unordered: every notification but the failed ones is stored, push those
+        failed = {error["index"] for error in e.details.get("writeErrors", [])}
+        batch = [job for index, job in enumerate(batch) if index not in failed]
+        logger.error(f"❌ Failed to store {len(failed)} notifications: {e}")
+    # Push over WebSocket from whichever worker holds the recipient's sockets
+    await notification_bus.publish(
+        [(notification_data["user_id"], push_data) for notification_data, push_data in batch]
+    )
+
+
+job_queue.register(NOTIFICATION_JOB, _store_and_push)
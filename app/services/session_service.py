@@ -0,0 +1,116 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from pymongo import ReturnDocument, UpdateOne
+from app.config.database.mongo import users_collection, user_sessions_collection
+
+logger = logging.getLogger("uvicorn")
+
+# Sessions untouched for this long are removed by the TTL index on `expires_at`
+SESSION_RETENTION = timedelta(days=90)
+
+SESSION_MIGRATION_BATCH = 500
+
+# Per-device auth state that used to live in `users.devices`
+SESSION_FIELDS = (
+    "otp",
+    "otp_verified",
+    "access_token",
+    "token_expire_at",
+    "logged_in_at",
+    "logged_out_at",
+)
+
+
+def _session_update(fields: dict) -> dict:
+    now = datetime.now(timezone.utc)
+    return {
+        "$set": {**fields, "updated_at": now, "expires_at": now + SESSION_RETENTION},
+        "$setOnInsert": {"created_at": now},
+    }
+
+
+async def _migrate_user_devices(user: dict):
+    """Move one user's legacy `devices` array into user_sessions."""
+    now = datetime.now(timezone.utc)
+    # $setOnInsert only: a session written since the array was read wins
+    operations = [
+        UpdateOne(
+            {"user_id": user["user_id"], "device_id": device["device_id"]},
+            {
+                "$setOnInsert": {
+                    **{field: device[field] for field in SESSION_FIELDS if field in device},
+                    "created_at": now,
+                    "updated_at": now,
+                    "expires_at": now + SESSION_RETENTION,
+                }
+            },
+            upsert=True,
+        )
+        for device in user.get("devices") or []
+        if device.get("device_id")
+    ]
+    if operations:
+        await user_sessions_collection.bulk_write(operations, ordered=False)
+    await users_collection.update_one({"_id": user["_id"]}, {"$unset": {"devices": ""}})
+
+
+async def get_session(user_id: str, device_id: str) -> Optional[dict]:
+    """
+    Session of `user_id` on `device_id`. Users not migrated yet are moved
+    over on first access.
+    """
+    session = await user_sessions_collection.find_one(
+        {"user_id": user_id, "device_id": device_id}
+    )
+    if session is not None:
+        return session
+
+    legacy_user = await users_collection.find_one(
+        {"user_id": user_id, "devices.device_id": device_id},
+        {"user_id": 1, "devices": 1},
+    )
+    if legacy_user is None:
+        return None
+    await _migrate_user_devices(legacy_user)
+    return await user_sessions_collection.find_one(
+        {"user_id": user_id, "device_id": device_id}
+    )
+
+
+async def save_session(user_id: str, device_id: str, **fields) -> dict:
+    """Create or update the session of `user_id` on `device_id`; returns it."""
+    return await user_sessions_collection.find_one_and_update(
+        {"user_id": user_id, "device_id": device_id},
+        _session_update(fields),
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def find_session_user_ids(device_id: str) -> list:
+    return [
+        session["user_id"]
+        async for session in user_sessions_collection.find(
+            {"device_id": device_id}, {"user_id": 1}
+        )
+    ]
+
+
+async def rename_session_user(old_user_id: str, new_user_id: str):
+    """Carry sessions over when a placeholder account is claimed under a new user_id."""
+    await user_sessions_collection.update_many(
+        {"user_id": old_user_id}, {"$set": {"user_id": new_user_id}}
+    )
+
+
+async def migrate_device_sessions() -> int:
+    """Move every legacy `users.devices` array into user_sessions. Returns users migrated."""
+    logger.info("session_service.migrate_device_sessions")
+    migrated = 0
+    async for user in users_collection.find(
+        {"devices.0": {"$exists": True}}, {"user_id": 1, "devices": 1}
+    ).batch_size(SESSION_MIGRATION_BATCH):
+        await _migrate_user_devices(user)
+        migrated += 1
+    return migrated
@@ -4,10 +4,11 @@ from app.config.database.mongo import (
     users_collection,
     users_connections_collection,
     points_collection,
-    user_notifications_collection,
 )
-from app.utils.notification_manager import notification_manager
+from app.services.notification_service import notify_user
 from app.utils.methods import (
+    apply_cursor,
+    build_next_cursor,
     convert_iso_date_to_humanize,
     create_exception_response,
     create_success_response,
@@ -21,12 +22,20 @@ from app.utils.messages import (
 )
 from app.models.schema import User
 from pymongo.errors import DuplicateKeyError
-from app.services.user_service import get_verified_user, update_user_object
+from app.services.user_service import (
+    fetch_users_map,
+    get_user,
+    get_verified_user,
+    update_user_object,
+)
+from app.config.database.projections import CONNECTION_CARD, IDENTITY
+from app.config.auth.user_loader import load_user
+from app.services.feed_service import backfill_feed, trim_feed
 
 logger = logging.getLogger("uvicorn")
 
 
-async def fetch_followers_service(login_user_id, user_id, page, limit):
+async def fetch_followers_service(login_user_id, user_id, page, limit, cursor=None):
     logger.info("social_service.fetch_followers_service")
     logger.info("Fetching followers for user_id: %s", user_id)
     try:
@@ -34,7 +43,7 @@ async def fetch_followers_service(login_user_id, user_id, page, limit):
         if error:
             return error
         if user_id:
-            saved_user = await users_collection.find_one({"user_id": user_id})
+            saved_user = await get_user(user_id, IDENTITY)
             if not saved_user:
                 return create_exception_response(
                     400, INVALID_DATA.format(data="user_id")
@@ -46,15 +55,27 @@ async def fetch_followers_service(login_user_id, user_id, page, limit):
                 {"follower_id": login_user_id}
             ).to_list(None)
         }
-        async for result in (
-            users_connections_collection.find({"following_id": saved_user["user_id"]})
-            .skip((page - 1) * limit)
-            .limit(limit)
-        ):
-            result.pop("_id", None)
-            follower_user = await users_collection.find_one(
-                {"user_id": result["follower_id"]}
-            )
+        query = {"following_id": saved_user["user_id"]}
+        if cursor:
+            try:
+                query = apply_cursor(query, cursor, "followed_at")
+            except ValueError:
+                return create_exception_response(400, INVALID_DATA.format(data="cursor"))
+        connections_cursor = users_connections_collection.find(query).sort(
+            [("followed_at", -1), ("_id", -1)]
+        )
+        if not cursor:
+            connections_cursor = connections_cursor.skip((page - 1) * limit)
+        raw_connections = await connections_cursor.limit(limit).to_list(length=limit)
+        next_cursor = build_next_cursor(raw_connections, limit, "followed_at")
+
+        users_map = await fetch_users_map(
+            [c["follower_id"] for c in raw_connections], CONNECTION_CARD
+        )
+        for result in raw_connections:
+            follower_user = users_map.get(result["follower_id"])
+            if not follower_user:
+                continue
             connections.append(
                 {
                     "user_id": follower_user["user_id"],
@@ -77,12 +98,13 @@ async def fetch_followers_service(login_user_id, user_id, page, limit):
             FETCHED_SUCCESS.format(data="followers"),
             total=total,
             results=connections,
+            next_cursor=next_cursor,
         )
     except Exception as e:
         return create_exception_response(500, f"An unexpected error occurred: {str(e)}")
 
 
-async def fetch_following_service(login_user_id, user_id, page, limit):
+async def fetch_following_service(login_user_id, user_id, page, limit, cursor=None):
     logger.info("social_service.fetch_following_service")
     logger.info("Fetching following for user_id: %s", user_id)
 
@@ -92,7 +114,7 @@ async def fetch_following_service(login_user_id, user_id, page, limit):
             return error
 
         if user_id:
-            saved_user = await users_collection.find_one({"user_id": user_id})
+            saved_user = await get_user(user_id, IDENTITY)
             if not saved_user:
                 return create_exception_response(
                     400, INVALID_DATA.format(data="user_id")
@@ -108,16 +130,28 @@ async def fetch_following_service(login_user_id, user_id, page, limit):
 
         connections = []
 
-        async for result in (
-            users_connections_collection.find({"follower_id": saved_user["user_id"]})
-            .skip((page - 1) * limit)
-            .limit(limit)
-        ):
-            result.pop("_id", None)
+        query = {"follower_id": saved_user["user_id"]}
+        if cursor:
+            try:
+                query = apply_cursor(query, cursor, "followed_at")
+            except ValueError:
+                return create_exception_response(400, INVALID_DATA.format(data="cursor"))
+        connections_cursor = users_connections_collection.find(query).sort(
+            [("followed_at", -1), ("_id", -1)]
+        )
+        if not cursor:
+            connections_cursor = connections_cursor.skip((page - 1) * limit)
+        raw_connections = await connections_cursor.limit(limit).to_list(length=limit)
+        next_cursor = build_next_cursor(raw_connections, limit, "followed_at")
 
-            following_user = await users_collection.find_one(
-                {"user_id": result["following_id"]}
-            )
+        users_map = await fetch_users_map(
+            [c["following_id"] for c in raw_connections], CONNECTION_CARD
+        )
+        for result in raw_connections:
+
+            following_user = users_map.get(result["following_id"])
+            if not following_user:
+                continue
 
             connections.append(
                 {
@@ -148,6 +182,7 @@ async def fetch_following_service(login_user_id, user_id, page, limit):
             FETCHED_SUCCESS.format(data="following"),
             total=total,
             results=connections,
+            next_cursor=next_cursor,
         )
 
     except Exception as e:
@@ -165,7 +200,7 @@ async def save_follow_service(login_user_id, user_id):
         if saved_user["user_id"] == user_id:
             return create_exception_response(400, "you can't follow yourself")
 
-        user: User = await users_collection.find_one({"user_id": user_id})
+        user: User = await load_user(user_id)
         if not user:
             return create_exception_response(400, INVALID_DATA.format(data="user_id"))
 
@@ -184,10 +219,9 @@ async def save_follow_service(login_user_id, user_id):
                 "followed_at": datetime.now(timezone.utc),
             }
         )
-        await update_user_object(
-            saved_user["_id"],
-            {"total_following": saved_user.get("total_following", 0) + 1},
-        )
+        await backfill_feed(saved_user["user_id"], user["user_id"])
+        total_following = saved_user.get("total_following", 0) + 1
+        await update_user_object(saved_user["_id"], {"total_following": total_following})
         await update_user_object(
             user["_id"], {"total_followers": user.get("total_followers", 0) + 1}
         )
@@ -209,39 +243,20 @@ async def save_follow_service(login_user_id, user_id):
             {"$inc": {"total_points": points}},
         )
         # Add notification
-        now = datetime.now(timezone.utc)
-        notification_data = {
-            "user_id": user["user_id"],
-            "actor_id": login_user_id,
-            "type": "follow",
-            "message": f"{saved_user.get('name', 'Someone')} started following you",
-            "is_read": False,
-            "created_at": now,
-        }
-        await user_notifications_collection.insert_one(notification_data)
-
-        # Push notification via WebSocket
-        await notification_manager.send_personal_notification(
+        await notify_user(
             user["user_id"],
-            {
-                "type": "follow",
-                "message": notification_data["message"],
-                "actor": {
-                    "user_id": login_user_id,
-                    "name": saved_user.get('name', 'Someone'),
-                    "avatar": saved_user.get('avatar', 'https://i.pravatar.cc/300?img=3'),
-                },
-                "created_at": now.isoformat()
-            }
+            saved_user,
+            "follow",
+            f"{saved_user.get('name', 'Someone')} started following you",
+            datetime.now(timezone.utc),
         )
 
-        saved_user: User = await users_collection.find_one({"user_id": login_user_id})
         return create_success_response(
             200,
             ACTION_SUCCESS.format(data=f"{user['username']} follow"),
             result={
                 "total_follower": saved_user.get("total_followers", 0),
-                "total_following": saved_user.get("total_following", 0),
+                "total_following": total_following,
             },
         )
     except DuplicateKeyError:
@@ -261,7 +276,7 @@ async def save_unfollow_service(login_user_id, user_id):
         if saved_user["user_id"] == user_id:
             return create_exception_response(400, "you can't unfollow yourself")
 
-        user: User = await users_collection.find_one({"user_id": user_id})
+        user: User = await load_user(user_id)
         if not user:
             return create_exception_response(400, INVALID_DATA.format(data="user_id"))
 
@@ -274,11 +289,10 @@ async def save_unfollow_service(login_user_id, user_id):
         await users_connections_collection.find_one_and_delete(
             {"follower_id": saved_user["user_id"], "following_id": user["user_id"]}
         )
+        await trim_feed(saved_user["user_id"], user["user_id"])
         # Update the total followers and following counts
-        await update_user_object(
-            saved_user["_id"],
-            {"total_following": max(0, saved_user.get("total_following", 0) - 1)},
-        )
+        total_following = max(0, saved_user.get("total_following", 0) - 1)
+        await update_user_object(saved_user["_id"], {"total_following": total_following})
         # This is to ensure that total_followers does not go below 0
         await update_user_object(
             user["_id"], {"total_followers": max(0, user.get("total_followers", 0) - 1)}
@@ -304,13 +318,12 @@ async def save_unfollow_service(login_user_id, user_id):
                 }
             ],
         )
-        saved_user: User = await users_collection.find_one({"user_id": login_user_id})
         return create_success_response(
             200,
             ACTION_SUCCESS.format(data=f"{user['username']} unfollow"),
             result={
                 "total_follower": saved_user.get("total_followers", 0),
-                "total_following": saved_user.get("total_following", 0),
+                "total_following": total_following,
             },
         )
     except DuplicateKeyError:
@@ -0,0 +1,133 @@
+"""
+Toggle engine for per-user relations on a post (hearts, bookmarks).
+
+A tap costs one relation write plus one concurrent round of side effects:
+the post counter goes through the write-behind buffer, while the points
+ledger and the user totals are written together. Notifications are left to
+the caller, which hands them off as background work.
+"""
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+from app.config.database.mongo import (
+    points_collection,
+    posts_bookmarks_collection,
+    posts_hearts_collection,
+    users_collection,
+)
+from app.services.counter_service import increment_stat
+
+logger = logging.getLogger("uvicorn")
+
+
+class Toggle:
+    """A relation between a user and a post and what flipping it is worth."""
+
+    def __init__(
+        self,
+        collection,
+        timestamp_field: str,
+        stat: str,
+        user_total: Optional[str] = None,
+        points: int = 0,
+        icon: str = "",
+        reason: str = "",
+    ):
+        self.collection = collection
+        self.timestamp_field = timestamp_field
+        self.stat = stat
+        self.user_total = user_total
+        self.points = points
+        self.icon = icon
+        self.reason = reason
+
+
+HEART = Toggle(
+    posts_hearts_collection,
+    "hearted_at",
+    "hearts",
+    points=5,
+    icon="❤️",
+    reason="Hearted post",
+)
+
+BOOKMARK = Toggle(
+    posts_bookmarks_collection,
+    "bookmarked_at",
+    "bookmarks",
+    user_total="total_bookmarks",
+)
+
+
+def clamped_inc(deltas: dict) -> list:
+    """Pipeline update adding `deltas` to the given fields without going below zero."""
+    return [
+        {
+            "$set": {
+                field: {"$max": [{"$add": [{"$ifNull": [f"${field}", 0]}, delta]}, 0]}
+                for field, delta in deltas.items()
+            }
+        }
+    ]
+
+
+async def _apply_side_effects(toggle: Toggle, user_id: str, post_oid, sign: int, now):
+    increment_stat(post_oid, toggle.stat, sign)
+
+    user_deltas = {}
+    if toggle.user_total:
+        user_deltas[toggle.user_total] = sign
+    if toggle.points:
+        user_deltas["total_points"] = sign * toggle.points
+
+    writes = []
+    if user_deltas:
+        writes.append(
+            users_collection.update_one({"user_id": user_id}, clamped_inc(user_deltas))
+        )
+    if toggle.points and sign > 0:
+        writes.append(
+            points_collection.insert_one(
+                {
+                    "user_id": user_id,
+                    "post_id": post_oid,
+                    "type": "earned",
+                    "icon": toggle.icon,
+                    "points": toggle.points,
+                    "reason": toggle.reason,
+                    "created_at": now,
+                }
+            )
+        )
+    elif toggle.points:
+        writes.append(
+            points_collection.delete_one(
+                {"user_id": user_id, "post_id": post_oid, "reason": toggle.reason}
+            )
+        )
+    # Ledger and totals live in different collections; one concurrent round
+    await asyncio.gather(*writes)
+
+
+async def flip(toggle: Toggle, user_id: str, post_oid) -> Optional[bool]:
+    """
+    Flip `user_id`'s relation to the post. Returns True when it was added,
+    False when it was removed and None when a concurrent tap removed it first.
+    """
+    now = datetime.now(timezone.utc)
+    relation = {"user_id": user_id, "post_id": post_oid}
+
+    # Adding is the common tap, so it is the single round trip
+    insert_result = await toggle.collection.update_one(
+        relation, {"$setOnInsert": {toggle.timestamp_field: now}}, upsert=True
+    )
+    if insert_result.upserted_id:
+        await _apply_side_effects(toggle, user_id, post_oid, 1, now)
+        return True
+
+    delete_result = await toggle.collection.delete_one(relation)
+    if not delete_result.deleted_count:
+        return None
+    await _apply_side_effects(toggle, user_id, post_oid, -1, now)
+    return False
@@ -1,11 +1,13 @@
+import asyncio
 from datetime import datetime, timezone
 import logging
 import random
 import uuid
-import re
+from typing import Iterable, Optional
 from bson import ObjectId
+from cachetools import TTLCache
 from app.queue.in_memory import enqueue_otp_task
-from app.config.auth.token import create_access_token
+from app.config.auth.token import create_access_token, revoke_token
 from app.models.schema import (
     PrefrenceRequest,
     RegisterDeviceRequest,
@@ -23,10 +25,28 @@ from app.utils.methods import (
     serialize_doc,
     token_expired_at,
     generate_unique_referral_code,
+    apply_cursor,
+    build_next_cursor,
 )
 from app.config.cache.in_memory_cache import (
     cached_mongo_call,
 )
+from app.utils.cache_manager import cache_manager
+from app.config.auth.user_loader import load_user
+from app.config.database.projections import (
+    ACCOUNT,
+    AUTH,
+    AUTHOR_CARD,
+    IDENTITY,
+    POINTS,
+    PROFILE,
+)
+from app.services.session_service import (
+    find_session_user_ids,
+    get_session,
+    rename_session_user,
+    save_session,
+)
 from pymongo.errors import DuplicateKeyError
 from app.config.database.mongo import (
     points_collection,
@@ -67,6 +87,9 @@ from app.utils.messages import (
 
 logger = logging.getLogger("uvicorn")
 
+# Short lived process cache of author cards shared by every page formatter
+_author_cache = TTLCache(maxsize=10000, ttl=60)
+
 
 async def fetch_interests_service():
     logger.info("user_service.fetch_interests_service")
@@ -85,36 +108,28 @@ async def fetch_prefrences_service(device_id: str, user_id: str):
     logger.info("user_service.fetch_prefrences_service")
     logger.info(f"Fetching prefrences for device {device_id} and user {user_id}")
     if user_id:
-        saved_user = await users_collection.find_one(
-            {"user_id": user_id, "devices.device_id": device_id}
+        session, saved_user = await asyncio.gather(
+            get_session(user_id, device_id), get_user(user_id, AUTH)
         )
-        if not saved_user:
+        # Logged out sessions have no token to refresh
+        if not session or not session.get("access_token") or not saved_user:
             return create_exception_response(400, NO_PREFERENCE)
 
-        devices = saved_user.get("devices", [])
-        current_device = next(
-            (d for d in devices if d.get("device_id") == device_id), {}
-        )
-
-        current_token = current_device.get("access_token", "")
         current_token, token_expiry, regenerated = regenerate_access_token_if_needed(
-            user_id, device_id, current_token
+            device_id, user_id, session["access_token"]
         )
 
         if regenerated:
-            await users_collection.update_one(
-                {"_id": saved_user["_id"], "devices.device_id": device_id},
-                {
-                    "$set": {
-                        "devices.$.access_token": current_token,
-                        "devices.$.token_expire_at": token_expiry,
-                        "devices.$.logged_out_at": None,
-                    }
-                },
+            await save_session(
+                user_id,
+                device_id,
+                access_token=current_token,
+                token_expire_at=token_expiry,
+                logged_out_at=None,
             )
 
         return build_preference_response(
-            {**saved_user, **current_device},
+            saved_user,
             device_id,
             current_token,
             token_expiry,
@@ -223,9 +238,9 @@ async def save_prefrence_service(request: PrefrenceRequest):
                 "username": username,
                 "created_at": datetime.now(timezone.utc),
                 "interests": request.interests,
-                "devices": [{"device_id": request.device_id}],
             }
         )
+        await save_session(user_id, request.device_id)
     except DuplicateKeyError as e:
         error_msg = str(e)
         if "device_id" in error_msg:
@@ -313,16 +328,28 @@ async def register_device_service(request: RegisterDeviceRequest):
     )
 
 
-async def fetch_user_points_service(user_id: str, page: int, limit: int):
+async def fetch_user_points_service(
+    user_id: str, page: int, limit: int, cursor: str = None
+):
     logger.info("user_service.fetch_user_points_service")
-    saved_user = await users_collection.find_one({"user_id": user_id})
+    saved_user = await get_user(user_id, POINTS)
     if not saved_user:
         return create_exception_response(404, NOT_FOUND.format(data="user"))
 
     total_points = saved_user.get("total_points", 0)
-    results = points_collection.find({"user_id": user_id}).sort("created_at", -1).skip((page - 1) * limit).limit(limit)
+    query = {"user_id": user_id}
+    if cursor:
+        try:
+            query = apply_cursor(query, cursor, "created_at")
+        except ValueError:
+            return create_exception_response(400, INVALID_DATA.format(data="cursor"))
+
+    points_cursor = points_collection.find(query).sort([("created_at", -1), ("_id", -1)])
+    if not cursor:
+        points_cursor = points_cursor.skip((page - 1) * limit)
+    results = await points_cursor.limit(limit).to_list(length=limit)
     activities = []
-    async for result in results:
+    for result in results:
         activities.append(
             {
                 "post_id": (
@@ -341,6 +368,7 @@ async def fetch_user_points_service(user_id: str, page: int, limit: int):
         query={"page": page, "limit": limit},
         result={"total_points": total_points},
         results=activities,
+        next_cursor=build_next_cursor(results, limit, "created_at"),
     )
 
 
@@ -351,7 +379,9 @@ async def fetch_user_profile_service(login_user_id: str, user_id: str):
     profile_type = "self" if target_user_id == login_user_id else "other"
     logger.info(f"Fetching {profile_type} profile for user_id: {target_user_id}")
 
-    saved_user = await users_collection.find_one({"user_id": target_user_id})
+    saved_user = await get_profile(
+        target_user_id, include_referral_codes=profile_type == "self"
+    )
     if not saved_user:
         return create_exception_response(
             400, INVALID_DATA.format(data="username")
@@ -402,7 +432,7 @@ async def fetch_user_profile_service(login_user_id: str, user_id: str):
 
 async def update_user_profile_service(user_id: str, request):
     logger.info(f"Updating profile for user with user_id: {user_id}")
-    saved_user = await users_collection.find_one({"user_id": user_id})
+    saved_user = await get_user(user_id, IDENTITY)
     if not saved_user:
         return create_exception_response(404, NOT_FOUND.format(data="user"))
     update_fields = {}
@@ -423,6 +453,7 @@ async def update_user_profile_service(user_id: str, request):
             {"_id": saved_user.get("_id")},
             {"$set": update_fields},
         )
+        forget_author(user_id)
     return create_success_response(
         200,
         FETCHED_SUCCESS.format(data="user profile updated"),
@@ -445,26 +476,22 @@ async def user_send_otp_service(send_otp: SendOTP):
         return create_exception_response(400, INVALID_DATA.format(data="device id"))
 
     # Optimize: Query by email first to cover both "same device" and "new device" login cases
-    saved_user = await users_collection.find_one({"email": email})
+    saved_user = await find_user({"email": email}, IDENTITY)
 
-    if saved_user:
-        # Check if the device is already associated with this user
-        device_exists = any(d.get("device_id") == send_otp.device_id for d in saved_user.get("devices", []))
-        
-        if not device_exists:
-            # Add new device to the existing user
-            await users_collection.update_one(
-                {"_id": saved_user["_id"]},
-                {"$addToSet": {"devices": {"device_id": send_otp.device_id}}}
-            )
-    else:
+    if not saved_user:
         # User not found by email. Check if there's a placeholder user for this device (e.g. "vurse_...")
         # This handles the case where a temporary user claims an account
-        saved_user = await users_collection.find_one(
+        session_user_ids = await find_session_user_ids(send_otp.device_id)
+        saved_user = await find_user(
             {
-                "devices.device_id": send_otp.device_id,
+                # devices.device_id covers users whose sessions are not migrated yet
+                "$or": [
+                    {"user_id": {"$in": session_user_ids}},
+                    {"devices.device_id": send_otp.device_id},
+                ],
                 "email": {"$regex": r"^vurse_", "$options": "i"},
-            }
+            },
+            IDENTITY,
         )
 
     otp = random.randint(1000, 9999)
@@ -475,38 +502,31 @@ async def user_send_otp_service(send_otp: SendOTP):
         if user_id == device_user_id:
             user_id = str(uuid.uuid4())
         
-        # Update the specific device's OTP using the positional operator $
-        # We query by _id and device_id to ensure we match the correct array element
         await users_collection.update_one(
-            {"_id": saved_user.get("_id"), "devices.device_id": send_otp.device_id},
+            {"_id": saved_user.get("_id")},
             {
                 "$set": {
                     "email": email,
-                    "devices.$.otp": otp,
-                    "devices.$.otp_verified": False,
                     "user_id": user_id,
                     "username": f"{email.split('@')[0]}_{random.randint(100, 999)}",
                 }
             },
         )
+        if user_id != saved_user.get("user_id"):
+            await rename_session_user(saved_user.get("user_id"), user_id)
     else:
         # Create new user
+        user_id = str(uuid.uuid4())
         await users_collection.insert_one(
             {
                 "email": email,
-                "user_id": str(uuid.uuid4()),
+                "user_id": user_id,
                 "username": f"{email.split('@')[0]}_{random.randint(100, 999)}",
                 "created_at": datetime.now(timezone.utc),
                 "interests": saved_device_user.get("interests"),
-                "devices": [
-                    {
-                        "device_id": send_otp.device_id,
-                        "otp": otp,
-                        "otp_verified": False,
-                    }
-                ],
             }
         )
+    await save_session(user_id, send_otp.device_id, otp=otp, otp_verified=False)
 
     # Use cache for email configuration to avoid repeated DB calls
     saved_email_config = await cached_mongo_call(email_config_collection, "find_one", {})
@@ -540,22 +560,18 @@ async def user_verify_otp_service(verify_otp: VerifyOTP):
     if saved_device_user is None:
         return create_exception_response(400, INVALID_DATA.format(data="device id"))
 
-    saved_user = await users_collection.find_one(
-        {"devices.device_id": verify_otp.device_id, "email": verify_otp.email}
+    saved_user = await find_user(
+        {"email": verify_otp.email},
+        {**IDENTITY, "username": 1, "referral_codes": 1},
     )
     if not saved_user:
         return create_exception_response(400, INVALID_DATA.format(data="device id"))
 
-    device = next(
-        (
-            d
-            for d in saved_user.get("devices", [])
-            if d.get("device_id") == verify_otp.device_id
-        ),
-        None,
-    )
+    session = await get_session(saved_user["user_id"], verify_otp.device_id)
+    if not session:
+        return create_exception_response(400, INVALID_DATA.format(data="device id"))
 
-    if not device or device.get("otp") != verify_otp.otp:
+    if session.get("otp") != verify_otp.otp:
         return create_exception_response(400, INVALID_DATA.format(data="otp"))
 
     access_token = create_access_token(
@@ -564,19 +580,15 @@ async def user_verify_otp_service(verify_otp: VerifyOTP):
             "user_id": saved_user.get("user_id"),
         }
     )
-    saved_user = await users_collection.find_one_and_update(
-        {"_id": saved_user.get("_id"), "devices.device_id": verify_otp.device_id},
-        {
-            "$set": {
-                "devices.$.otp": "",
-                "devices.$.otp_verified": True,
-                "devices.$.access_token": access_token,
-                "devices.$.token_expire_at": token_expired_at(access_token),
-                "devices.$.logged_in_at": datetime.now(timezone.utc),
-                "devices.$.logged_out_at": None,
-            }
-        },
-        return_document=True
+    await save_session(
+        saved_user.get("user_id"),
+        verify_otp.device_id,
+        otp="",
+        otp_verified=True,
+        access_token=access_token,
+        token_expire_at=token_expired_at(access_token),
+        logged_in_at=datetime.now(timezone.utc),
+        logged_out_at=None,
     )
     
     # Award 50 points for registration if not already awarded
@@ -607,7 +619,10 @@ async def user_verify_otp_service(verify_otp: VerifyOTP):
     if not saved_user.get("referral_codes"):
         await generate_referral_codes_service(saved_user.get("user_id"), 5)
         # Re-fetch user to get the codes
-        saved_user = await users_collection.find_one({"_id": saved_user.get("_id")})
+        saved_user = await find_user(
+            {"_id": saved_user.get("_id")},
+            {**IDENTITY, "username": 1, "referral_codes": 1},
+        )
 
     return create_success_response(
         200,
@@ -657,8 +672,9 @@ async def redeem_referral_code_service(auth_response, request: RedeemReferralCod
     code = request.referral_code.strip()
     
     # Find user with this code
-    owner_user = await users_collection.find_one(
-        {"referral_codes": {"$elemMatch": {"code": code, "is_used": False}}}
+    owner_user = await find_user(
+        {"referral_codes": {"$elemMatch": {"code": code, "is_used": False}}},
+        IDENTITY,
     )
     
     if not owner_user:
@@ -730,11 +746,9 @@ async def regenerate_token_service(request: RegenerateTokenRequest):
     )
 
     # Check if user exists with this device
-    saved_user = await users_collection.find_one(
-        {"user_id": request.user_id, "devices.device_id": request.device_id}
-    )
+    session = await get_session(request.user_id, request.device_id)
 
-    if not saved_user:
+    if not session:
         # Check if it's a device-only user
         saved_device_user = await user_devices_collection.find_one(
             {"device_id": request.device_id, "user_id": request.user_id}
@@ -744,20 +758,6 @@ async def regenerate_token_service(request: RegenerateTokenRequest):
                 400, NOT_FOUND.format(data="user/device record")
             )
 
-        doc = saved_device_user
-        collection = user_devices_collection
-        query = {"_id": doc["_id"]}
-        update_query = {
-            "$set": {
-                "access_token": None,
-                "token_expire_at": None,
-            }
-        }  # Placeholder, will update below
-    else:
-        doc = saved_user
-        collection = users_collection
-        query = {"_id": doc["_id"], "devices.device_id": request.device_id}
-
     # Generate new token
     access_token = create_access_token(
         data={"sub": request.device_id, "user_id": request.user_id}
@@ -765,20 +765,17 @@ async def regenerate_token_service(request: RegenerateTokenRequest):
     expiry = token_expired_at(access_token)
 
     # Update token in database
-    if saved_user:
-        await collection.update_one(
-            query,
-            {
-                "$set": {
-                    "devices.$.access_token": access_token,
-                    "devices.$.token_expire_at": expiry,
-                    "devices.$.logged_out_at": None,
-                }
-            },
+    if session:
+        await save_session(
+            request.user_id,
+            request.device_id,
+            access_token=access_token,
+            token_expire_at=expiry,
+            logged_out_at=None,
         )
     else:
-        await collection.update_one(
-            query,
+        await user_devices_collection.update_one(
+            {"_id": saved_device_user["_id"]},
             {
                 "$set": {
                     "access_token": access_token,
@@ -804,33 +801,21 @@ async def user_logout_service(auth_response):
     logger.info(f"Logging out user with device_id: {auth_response.result['device_id']}")
     device_id = auth_response.result["device_id"]
     user_id = auth_response.result.get("user_id")
-    saved_user = await users_collection.find_one(
-        {"devices.device_id": device_id, "user_id": user_id}
-    )
-    if saved_user:
-        devices = saved_user.get("devices", [])
-        current_device = next(
-            (d for d in devices if d.get("device_id") == device_id), None
-        )
-
-        if current_device.get("access_token") is None:
+    session = await get_session(user_id, device_id)
+    if session:
+        if session.get("access_token") is None:
             return create_exception_response(400, INVALID_TOKEN)
-        if not current_device.get("otp_verified", True):
+        if not session.get("otp_verified", True):
             return create_exception_response(400, ALREADY_LOGOUT)
-        await users_collection.update_one(
-            {
-                "_id": saved_user.get("_id"),
-                "devices.device_id": device_id,
-            },
-            {
-                "$set": {
-                    "devices.$.otp_verified": False,
-                    "devices.$.logged_in_at": None,
-                    "devices.$.access_token": None,
-                    "devices.$.token_expire_at": None,
-                    "devices.$.logged_out_at": datetime.now(timezone.utc),
-                }
-            },
+        await revoke_token(session["access_token"])
+        await save_session(
+            user_id,
+            device_id,
+            otp_verified=False,
+            logged_in_at=None,
+            access_token=None,
+            token_expire_at=None,
+            logged_out_at=datetime.now(timezone.utc),
         )
         saved_device_user = await user_devices_collection.find_one(
             {"device_id": device_id}
@@ -865,13 +850,81 @@ async def user_logout_service(auth_response):
     return create_exception_response(404, NOT_FOUND.format(data="user"))
 
 
+# ---------------- User accessors ---------------- #
+# Every read on users_collection goes through these with a named projection
+# from app/config/database/projections.py.
+
+
+async def find_user(query: dict, projection: dict) -> Optional[dict]:
+    return await users_collection.find_one(query, projection)
+
+
+async def get_user(user_id: str, projection: dict = ACCOUNT) -> Optional[dict]:
+    return await find_user({"user_id": user_id}, projection)
+
+
+async def get_profile(user_id: str, include_referral_codes: bool = False) -> Optional[dict]:
+    projection = {**PROFILE, "referral_codes": 1} if include_referral_codes else PROFILE
+    return await get_user(user_id, projection)
+
+
+async def fetch_users_map(user_ids: Iterable[str], projection: dict) -> dict:
+    """Resolve many users with one `$in` query. Returns user_id -> document."""
+    user_ids = list(set(user_ids))
+    if not user_ids:
+        return {}
+    return {
+        user["user_id"]: user
+        async for user in users_collection.find(
+            {"user_id": {"$in": user_ids}}, {**projection, "user_id": 1}
+        )
+    }
+
+
 async def get_verified_user(user_id: str):
-    user = await users_collection.find_one({"user_id": user_id})
+    """The signed-in user (ACCOUNT projection), read at most once per request."""
+    user = await load_user(user_id)
     if not user:
         return None, create_exception_response(400, SOME_ERROR)
     return user, None
 
 
+async def fetch_authors_map(user_ids) -> dict:
+    """
+    Resolve author cards for every user id on a page with at most one query.
+    Returns a dict of user_id -> card; unknown ids are left out.
+    """
+    authors = {}
+    missing = []
+    for user_id in set(user_ids):
+        author = _author_cache.get(user_id)
+        if author is None:
+            missing.append(user_id)
+        else:
+            authors[user_id] = author
+
+    if missing:
+        async for author in users_collection.find(
+            {"user_id": {"$in": missing}}, AUTHOR_CARD
+        ):
+            _author_cache[author["user_id"]] = author
+            authors[author["user_id"]] = author
+    return authors
+
+
+def forget_author(user_id: str):
+    """Drop a cached author card after the user's profile changed."""
+    _author_cache.pop(user_id, None)
+
+
+@cache_manager.on_invalidate
+def _forget_invalidated_authors(tags: list):
+    # Author cards change in whichever worker handled the profile update
+    for tag in tags:
+        if tag.startswith("author:"):
+            forget_author(tag.split(":", 1)[1])
+
+
 async def update_user_object(id, set):
     await users_collection.update_one(
         {"_id": id},
@@ -890,21 +943,20 @@ async def fetch_users_service(search: str, page: int, limit: int, current_user_i
             200, FETCHED_SUCCESS.format(data="users"), results=[]
         )
 
-    escaped = re.escape(search)
-    regex_pattern = {"$regex": escaped, "$options": "i"}
-
+    # Served by the users text index, best matches first
     query = {
-        "$or": [
-            {"username": regex_pattern},
-            {"name": regex_pattern},
-            {"email": regex_pattern},
-        ],
+        "$text": {"$search": search},
         "user_id": {"$ne": current_user_id},
     }
+    projection = {
+        **AUTHOR_CARD,
+        "total_followers": 1,
+        "score": {"$meta": "textScore"},
+    }
 
     cursor = (
-        users_collection.find(query)
-        .sort("created_at", -1)
+        users_collection.find(query, projection)
+        .sort([("score", {"$meta": "textScore"}), ("created_at", -1)])
         .skip((page - 1) * limit)
         .limit(limit)
     )
@@ -1,73 +1,158 @@
 import functools
 import hashlib
-import json
-from datetime import timedelta
-from typing import Any, Callable, Dict, List, Optional, Union
-from cachetools import TTLCache
+import logging
+from enum import Enum
+from typing import Any, Callable, Iterable, List, Optional, Union
+from pydantic import BaseModel
+from app.config.cache.backend import (
+    MISSING,
+    CacheBackend,
+    LocalCacheBackend,
+    create_cache_backend,
+)
+from app.utils.enums.ResponseStatus import ResponseStatus
+
+logger = logging.getLogger("uvicorn")
+
+# A tag is either a static string or a callable `(kwargs, result) -> iterable of tags`
+# deriving entity tags such as "post:<id>" or "viewer:<id>" from the call and its result.
+Tag = Union[str, Callable[[dict, Any], Iterable[str]]]
+
+# A key builder maps the call kwargs to the tuple of inputs that identify a cached
+# entry, or to None when the call must bypass the cache.
+KeyBuilder = Callable[[dict], Optional[tuple]]
+
+
+def _key_part(value):
+    if isinstance(value, BaseModel):
+        return tuple(sorted((k, _key_part(v)) for k, v in value.model_dump().items()))
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_key_part(v) for v in value)
+    return value
+
+
+def cache_key(*params: str, viewer: bool = True) -> KeyBuilder:
+    """
+    Key builder for endpoints taking `auth_response`: the entry is identified by
+    the named params, plus the viewer's user_id when `viewer` is set.
+    Failed auth responses bypass the cache.
+    """
+    def build(kwargs: dict) -> Optional[tuple]:
+        auth_response = kwargs.get("auth_response")
+        if auth_response is not None and (
+            auth_response.status == ResponseStatus.FAILURE or not auth_response.result
+        ):
+            return None
+        parts = tuple(_key_part(kwargs.get(name)) for name in params)
+        if viewer and auth_response is not None:
+            parts = (auth_response.result.get("user_id"),) + parts
+        return parts
+
+    return build
+
+
+# Channel on which invalidated tags are broadcast to every worker
+INVALIDATION_CHANNEL = "cache.invalidate"
+
 
 class CacheManager:
-    def __init__(self, default_ttl: int = 300, maxsize: int = 1000):
-        self._caches: Dict[str, TTLCache] = {}
-        self._tag_to_keys: Dict[str, set] = {}
+    def __init__(self, default_ttl: int = 300, backend: Optional[CacheBackend] = None):
         self._default_ttl = default_ttl
-        self._maxsize = maxsize
-
-    def _get_cache(self, ttl: int) -> TTLCache:
-        cache_key = f"ttl_{ttl}"
-        if cache_key not in self._caches:
-            self._caches[cache_key] = TTLCache(maxsize=self._maxsize, ttl=ttl)
-        return self._caches[cache_key]
-
-    def _generate_key(self, func: Callable, args: tuple, kwargs: dict) -> str:
-        # Create a stable key from function name and arguments
-        # Handle non-serializable objects (like MyResponse or other complex types)
-        # We'll use a simplified version for now
-        arg_str = str(args) + str(sorted(kwargs.items()))
-        hash_val = hashlib.md5(arg_str.encode()).hexdigest()
-        return f"{func.__name__}:{hash_val}"
-
-    def cached(self, ttl: Optional[int] = None, tags: Optional[List[str]] = None):
+        self._backend = backend or LocalCacheBackend()
+        self._invalidation_handlers: List[Callable[[List[str]], Any]] = []
+
+    @property
+    def backend(self) -> CacheBackend:
+        return self._backend
+
+    def _generate_key(
+        self, func: Callable, args: tuple, kwargs: dict, key: Optional[KeyBuilder]
+    ) -> Optional[str]:
+        if key is not None:
+            parts = key(kwargs)
+            if parts is None:
+                return None
+        else:
+            # No declared inputs: fall back to every argument
+            parts = (
+                tuple(_key_part(a) for a in args),
+                tuple(sorted((k, _key_part(v)) for k, v in kwargs.items())),
+            )
+        hash_val = hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+        return f"{func.__qualname__}:{hash_val}"
+
+    def _resolve_tags(self, tags: List[Tag], kwargs: dict, result) -> set:
+        resolved = set()
+        for tag in tags:
+            if callable(tag):
+                resolved.update(t for t in tag(kwargs, result) if t)
+            else:
+                resolved.add(tag)
+        return resolved
+
+    def cached(
+        self,
+        ttl: Optional[int] = None,
+        tags: Optional[List[Tag]] = None,
+        key: Optional[KeyBuilder] = None,
+    ):
         ttl = ttl or self._default_ttl
         tags = tags or []
 
         def decorator(func: Callable):
             @functools.wraps(func)
             async def wrapper(*args, **kwargs):
-                cache = self._get_cache(ttl)
-                key = self._generate_key(func, args, kwargs)
+                entry_key = self._generate_key(func, args, kwargs, key)
+                if entry_key is None:
+                    return await func(*args, **kwargs)
 
-                if key in cache:
-                    # print(f"Cache hit for {key}")
-                    return cache[key]
+                cached = await self._backend.get(entry_key)
+                if cached is not MISSING:
+                    # print(f"Cache hit for {entry_key}")
+                    return cached
 
-                # print(f"Cache miss for {key}")
+                # print(f"Cache miss for {entry_key}")
                 result = await func(*args, **kwargs)
                 
                 # Only cache successful results (assuming MyResponse object)
-                # If it's not a MyResponse object, we might need a more generic check
-                cache[key] = result
-                
-                # Track keys by tags for invalidation
-                for tag in tags:
-                    if tag not in self._tag_to_keys:
-                        self._tag_to_keys[tag] = set()
-                    self._tag_to_keys[tag].add((ttl, key))
-                
+                if getattr(result, "status", None) == ResponseStatus.FAILURE:
+                    return result
+                await self._backend.set(
+                    entry_key, result, ttl, self._resolve_tags(tags, kwargs, result)
+                )
                 return result
             return wrapper
         return decorator
 
-    def invalidate(self, tags: Union[str, List[str]]):
+    def on_invalidate(self, handler: Callable[[List[str]], Any]):
+        """
+        Register `handler(tags)` to run in every worker whenever tags are
+        invalidated, so process-local caches can follow the shared one.
+        """
+        self._invalidation_handlers.append(handler)
+        return handler
+
+    async def _apply_invalidation(self, tags: List[str]):
+        for handler in self._invalidation_handlers:
+            try:
+                handler(tags)
+            except Exception as e:
+                logger.error(f"❌ Cache invalidation handler failed: {e}")
+
+    async def start(self):
+        """Subscribe this worker to invalidations broadcast by the others."""
+        await self._backend.subscribe(INVALIDATION_CHANNEL, self._apply_invalidation)
+
+    async def invalidate(self, tags: Union[str, List[str]]):
         if isinstance(tags, str):
             tags = [tags]
-        
-        for tag in tags:
-            if tag in self._tag_to_keys:
-                for ttl, key in self._tag_to_keys[tag]:
-                    cache = self._get_cache(ttl)
-                    if key in cache:
-                        del cache[key]
-                del self._tag_to_keys[tag]
-                # print(f"Invalidated cache for tag: {tag}")
-
-cache_manager = CacheManager()
+
+        await self._backend.invalidate(tags)
+        if not await self._backend.publish(INVALIDATION_CHANNEL, list(tags)):
+            # Daemon unreachable: at least this worker's local caches must follow
+            await self._apply_invalidation(list(tags))
+        # print(f"Invalidated cache for tags: {tags}")
+
+cache_manager = CacheManager(backend=create_cache_backend())
@@ -0,0 +1,68 @@
+"""
+Entity tag builders for `cache_manager.cached(tags=[...])`.
+
+Cached endpoints tag their entries with the entities they were built from,
+and write paths invalidate exactly those tags:
+
+- "viewer:<user_id>"      everything rendered for a given viewer
+- "post:<post_id>"        every entry that contains the post
+- "author:<user_id>"      every entry that renders the user's author card
+- "profile:<user_id>"     the user's profile
+- "user_posts:<user_id>"  listings of the user's own posts / drafts
+- "hearts:<post_id>", "comments:<post_id>", "bookmarks:<user_id>"
+"""
+
+
+def _viewer_id(kwargs: dict):
+    auth_response = kwargs.get("auth_response")
+    if auth_response is None or not auth_response.result:
+        return None
+    return auth_response.result.get("user_id")
+
+
+def _result_items(result) -> list:
+    if result.results is not None:
+        return result.results
+    if isinstance(result.result, dict):
+        return [result.result]
+    return []
+
+
+def viewer_tag(kwargs: dict, result):
+    yield f"viewer:{_viewer_id(kwargs)}"
+
+
+def post_tags(kwargs: dict, result):
+    """Tag an entry with the post in its path plus every post in its payload."""
+    if kwargs.get("post_id"):
+        yield f"post:{kwargs['post_id']}"
+    for item in _result_items(result):
+        if item.get("id"):
+            yield f"post:{item['id']}"
+
+
+def author_tags(kwargs: dict, result):
+    for item in _result_items(result):
+        author_id = (item.get("author") or {}).get("user_id") or item.get("user_id")
+        if author_id:
+            yield f"author:{author_id}"
+
+
+def user_posts_tag(kwargs: dict, result):
+    yield f"user_posts:{kwargs.get('user_id') or _viewer_id(kwargs)}"
+
+
+def profile_tag(kwargs: dict, result):
+    yield f"profile:{kwargs.get('user_id') or _viewer_id(kwargs)}"
+
+
+def hearts_tag(kwargs: dict, result):
+    yield f"hearts:{kwargs['post_id']}"
+
+
+def comments_tag(kwargs: dict, result):
+    yield f"comments:{kwargs['post_id']}"
+
+
+def bookmarks_tag(kwargs: dict, result):
+    yield f"bookmarks:{_viewer_id(kwargs)}"
@@ -11,6 +11,7 @@ class PostSortBy(str, Enum):
     MOST_VIEWED = "most_viewed"
     MOST_HEARTED = "most_hearted"
     MOST_COMMENTED = "most_commented"
+    RELEVANCE = "relevance"
 
 class PostFilter(str, Enum):
     FOLLOWING = "following"
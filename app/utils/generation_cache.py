@@ -0,0 +1,98 @@
+"""
+Opt-in cache of LLM generations for `/v1/generate`.
+
+Popular presets send the same (type, prompt, theme, size, language, model)
+over and over. Requests that opt in share generations for their normalized
+parameters: the first `generation_cache_variants` requests each generate and
+add a variant to the pool, later ones are served the pooled variants in
+rotation. Identical requests in flight at the same time in this worker share
+one provider call when it succeeds; if it fails, each waiter generates with
+its own key. Pools live in the cache backend, so with the cache daemon
+every worker draws from the same ones.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import re
+import time
+from typing import Awaitable, Callable, Dict
+from app.config.cache.backend import MISSING
+from app.utils.cache_manager import cache_manager
+from app.utils.llm import provider_name
+from app.utils.settings import settings
+
+logger = logging.getLogger("uvicorn")
+
+GENERATION_TAG = "generation"
+
+# digest -> generation in flight, awaited by every identical request
+_in_flight: Dict[str, asyncio.Future] = {}
+
+
+def _normalize(text) -> str:
+    value = getattr(text, "value", text)
+    return re.sub(r"\s+", " ", str(value or "")).strip().lower()
+
+
+def generation_key(type, prompt, theme, size, language, model) -> str:
+    params = [
+        _normalize(type),
+        _normalize(prompt),
+        _normalize(theme),
+        int(size),
+        _normalize(language),
+        provider_name(model),
+    ]
+    digest = hashlib.blake2b(json.dumps(params).encode(), digest_size=16).hexdigest()
+    return f"generation:{digest}"
+
+
+async def _generate_variant(key: str, generate: Callable[[], Awaitable[dict]]) -> dict:
+    output = await generate()
+    if output:
+        pool = await cache_manager.backend.get(key)
+        if pool is MISSING:
+            pool = {
+                "variants": [],
+                "next": 0,
+                "expires_at": time.time() + settings.generation_cache_ttl,
+            }
+        if len(pool["variants"]) < settings.generation_cache_variants:
+            await _store_pool(key, {**pool, "variants": pool["variants"] + [output]})
+    return output
+
+
+async def _store_pool(key: str, pool: dict):
+    # The pool expires `generation_cache_ttl` after its first variant, however
+    # often it is written back afterwards
+    expires_at = pool.setdefault("expires_at", time.time() + settings.generation_cache_ttl)
+    ttl = math.ceil(expires_at - time.time())
+    if ttl > 0:
+        await cache_manager.backend.set(key, pool, ttl, [GENERATION_TAG])
+
+
+async def get_or_generate(key: str, generate: Callable[[], Awaitable[dict]]) -> dict:
+    """A pooled generation for `key`, or a fresh one from `generate()` while the pool fills."""
+    pool = await cache_manager.backend.get(key)
+    if pool is not MISSING and len(pool["variants"]) >= settings.generation_cache_variants:
+        variants, index = pool["variants"], pool["next"] % len(pool["variants"])
+        await _store_pool(key, {**pool, "next": index + 1})
+        return variants[index]
+
+    flight = _in_flight.get(key)
+    started = flight is None
+    if started:
+        flight = asyncio.ensure_future(_generate_variant(key, generate))
+        _in_flight[key] = flight
+        flight.add_done_callback(lambda _: _in_flight.pop(key, None))
+    try:
+        # Shielded: one caller giving up must not cancel the call the others wait on
+        return await asyncio.shield(flight)
+    except Exception:
+        if started:
+            raise
+        # The shared call ran with the first caller's API key: its failure (an
+        # invalid key, no quota) says nothing about ours, generate with our own
+        return await _generate_variant(key, generate)
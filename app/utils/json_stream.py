@@ -0,0 +1,177 @@
+"""
+Incremental extractor for the `{"title", "content", "tags"}` object LLMs stream back.
+
+Feed it the raw text chunks as they arrive; it returns the events ready so far:
+
+    ("title", "The Brave Little Boy")      once the title string is complete
+    ("content", "Once upon a ")            every new piece of the content string
+    ("tags", ["fantasy", "kids"])          once the tags array is complete
+
+Markdown fences and any text around the object are ignored. Other keys are
+skipped. Escapes split across chunks (including surrogate pairs) are held back
+until they are complete.
+"""
+import json
+from typing import List, Tuple
+
+Event = Tuple[str, object]
+
+_BEFORE, _KEY, _COLON, _VALUE, _STRING, _ARRAY, _SCALAR, _NEXT, _DONE = range(9)
+
+
+def _decode_ready(raw: str) -> Tuple[str, str]:
+    """Split raw JSON string text into (decoded complete part, raw incomplete tail)."""
+    i, n = 0, len(raw)
+    while i < n:
+        if raw[i] != "\\":
+            i += 1
+            continue
+        escape = raw[i + 1 : i + 4].lower()
+        if escape[:1] != "u":
+            size = 2
+        elif len(escape) == 3 and escape[1] == "d" and escape[2] in "89ab":
+            # High surrogate: only decodable together with the low half that follows
+            size = 12
+        else:
+            size = 6
+        if i + size > n:
+            break
+        i += size
+    return json.loads(f'"{raw[:i]}"'), raw[i:]
+
+
+class GenerationStreamParser:
+    def __init__(self):
+        self._state = _BEFORE
+        self._depth = 0
+        self._key = ""
+        self._raw = ""
+        self._reading_key = False
+        self._in_string = False
+        self._escaped = False
+
+    @property
+    def done(self) -> bool:
+        return self._state == _DONE
+
+    def feed(self, chunk: str) -> List[Event]:
+        events = []
+        i, n = 0, len(chunk)
+        while i < n and self._state != _DONE:
+            state = self._state
+
+            if state == _BEFORE:
+                start = chunk.find("{", i)
+                if start < 0:
+                    return events
+                self._state, i = _KEY, start + 1
+
+            elif state == _KEY:
+                # Either the opening quote of a key or the closing brace
+                char = chunk[i]
+                i += 1
+                if char == '"':
+                    self._key, self._raw, self._state = "", "", _STRING
+                    self._reading_key, self._escaped = True, False
+                elif char == "}":
+                    self._state = _DONE
+
+            elif state == _STRING:
+                i = self._read_string(chunk, i, events)
+
+            elif state == _COLON:
+                char = chunk[i]
+                i += 1
+                if char == ":":
+                    self._state = _VALUE
+
+            elif state == _VALUE:
+                char = chunk[i]
+                if char.isspace():
+                    i += 1
+                elif char == '"':
+                    self._raw, self._state = "", _STRING
+                    self._reading_key, self._escaped = False, False
+                    i += 1
+                elif char in "[{":
+                    self._raw, self._depth, self._state = "", 0, _ARRAY
+                    self._in_string = self._escaped = False
+                else:
+                    self._raw, self._state = "", _SCALAR
+
+            elif state == _ARRAY:
+                i = self._read_container(chunk, i, events)
+
+            elif state == _SCALAR:
+                end = i
+                while end < n and chunk[end] not in ",}":
+                    end += 1
+                i, self._state = end, (_NEXT if end < n else _SCALAR)
+
+            elif state == _NEXT:
+                char = chunk[i]
+                i += 1
+                if char == ",":
+                    self._state = _KEY
+                elif char == "}":
+                    self._state = _DONE
+        return events
+
+    def _read_string(self, chunk: str, i: int, events: List[Event]) -> int:
+        # Scan up to the closing quote, stepping over escapes
+        start, n = i, len(chunk)
+        while i < n:
+            char = chunk[i]
+            if self._escaped:
+                self._escaped = False
+            elif char == "\\":
+                self._escaped = True
+            elif char == '"':
+                break
+            i += 1
+        self._raw += chunk[start:i]
+        closed = i < n
+
+        if self._reading_key:
+            if closed:
+                self._key = json.loads(f'"{self._raw}"')
+                self._state = _COLON
+            return i + 1 if closed else i
+
+        if self._key == "content":
+            decoded, self._raw = _decode_ready(self._raw)
+            if decoded:
+                events.append(("content", decoded))
+        if closed:
+            if self._key == "title":
+                events.append(("title", json.loads(f'"{self._raw}"')))
+            self._raw, self._state = "", _NEXT
+            return i + 1
+        return i
+
+    def _read_container(self, chunk: str, i: int, events: List[Event]) -> int:
+        start, n = i, len(chunk)
+        while i < n:
+            char = chunk[i]
+            i += 1
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "[{":
+                self._depth += 1
+            elif char in "]}":
+                self._depth -= 1
+                if self._depth == 0:
+                    break
+        self._raw += chunk[start:i]
+        if self._depth == 0:
+            if self._key == "tags":
+                events.append(("tags", json.loads(self._raw)))
+            self._raw, self._state = "", _NEXT
+        return i
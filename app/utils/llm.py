@@ -0,0 +1,176 @@
+"""
+Runs LLM generations off the event loop.
+
+The provider SDK calls are blocking and take seconds, so they run on a
+dedicated, bounded thread pool. Each provider gets its own concurrency limit,
+and every generation is bounded by `settings.llm_timeout_seconds`, including
+the time it waits for a free slot. `stream_content` relays a provider's token
+stream from its thread to the event loop as it is produced.
+
+Providers implement LLMProvider (app/utils/llm_provider.py) and are looked up
+by the `model` request parameter in the registry below.
+"""
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import AsyncIterator, Dict
+from app.utils.gemini import GeminiProvider
+from app.utils.llm_provider import LLMProvider
+from app.utils.openai import OpenAIProvider
+from app.utils.settings import settings
+from app.utils.stub_llm import StubProvider
+
+logger = logging.getLogger("uvicorn")
+
+_executor = ThreadPoolExecutor(
+    max_workers=settings.llm_threads, thread_name_prefix="llm"
+)
+
+# provider -> slots for generations in flight, waiting or running
+_provider_slots = defaultdict(lambda: asyncio.Semaphore(settings.llm_concurrency))
+
+# Provider used when `model` names none of the registered ones
+DEFAULT_PROVIDER = "gemini"
+
+_providers: Dict[str, LLMProvider] = {}
+
+
+def register_provider(provider: LLMProvider):
+    _providers[provider.name] = provider
+
+
+def get_provider(model: str) -> LLMProvider:
+    return _providers.get((model or "").lower(), _providers[DEFAULT_PROVIDER])
+
+
+register_provider(GeminiProvider())
+register_provider(OpenAIProvider())
+if settings.llm_stub_enabled:
+    register_provider(
+        StubProvider(settings.llm_stub_latency_ms, settings.llm_stub_tokens_per_second)
+    )
+
+# Marks the end of a relayed stream
+_END = object()
+
+
+def provider_name(model: str) -> str:
+    return get_provider(model).name
+
+
+def _release_slot(semaphore: asyncio.Semaphore, future: asyncio.Future):
+    semaphore.release()
+    # Results of generations abandoned on timeout are dropped here
+    if not future.cancelled():
+        future.exception()
+
+
+async def _run_in_pool(provider: str, call):
+    semaphore = _provider_slots[provider]
+    await semaphore.acquire()
+    future = asyncio.get_running_loop().run_in_executor(_executor, call)
+    # A thread cannot be interrupted: the slot stays taken until it really finishes
+    future.add_done_callback(partial(_release_slot, semaphore))
+    return await asyncio.shield(future)
+
+
+async def generate_content(
+    model: str,
+    ai_key: str,
+    content_type,
+    content_about: str,
+    content_size: int,
+    content_language: str,
+    content_theme: str,
+) -> dict:
+    """
+    Generate a post with the provider selected by `model`. Raises
+    asyncio.TimeoutError when it does not finish within the configured timeout.
+    """
+    provider = get_provider(model)
+    call = partial(
+        provider.generate,
+        ai_key,
+        content_type,
+        content_about,
+        content_size,
+        content_language,
+        content_theme,
+    )
+    return await asyncio.wait_for(
+        _run_in_pool(provider.name, call), settings.llm_timeout_seconds
+    )
+
+
+async def stream_content(
+    model: str,
+    ai_key: str,
+    content_type,
+    content_about: str,
+    content_size: int,
+    content_language: str,
+    content_theme: str,
+) -> AsyncIterator[str]:
+    """
+    Yield the raw generated text chunk by chunk. The provider stream is read
+    on the LLM thread pool; closing this iterator early (client gone) stops it.
+    Raises asyncio.TimeoutError when the whole stream outlives the timeout.
+    """
+    provider = get_provider(model)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.llm_timeout_seconds
+    chunks = asyncio.Queue()
+    stop = threading.Event()
+
+    def put(item):
+        try:
+            loop.call_soon_threadsafe(chunks.put_nowait, item)
+        except RuntimeError:
+            # Loop already closed on shutdown
+            stop.set()
+
+    def relay():
+        stream = None
+        try:
+            stream = provider.stream(
+                ai_key,
+                content_type,
+                content_about,
+                content_size,
+                content_language,
+                content_theme,
+            )
+            for chunk in stream:
+                if stop.is_set():
+                    return
+                put(chunk)
+        except Exception as e:
+            put(e)
+        finally:
+            # Stops the provider's generator (and its HTTP response) when the
+            # consumer went away mid-stream
+            close = getattr(stream, "close", None)
+            if close is not None:
+                try:
+                    close()
+                except Exception as e:
+                    logger.warning(f"⚠️ Failed to close {provider.name} stream: {e}")
+            put(_END)
+
+    semaphore = _provider_slots[provider.name]
+    await asyncio.wait_for(semaphore.acquire(), settings.llm_timeout_seconds)
+    future = loop.run_in_executor(_executor, relay)
+    future.add_done_callback(partial(_release_slot, semaphore))
+    try:
+        while True:
+            item = await asyncio.wait_for(chunks.get(), max(deadline - loop.time(), 0))
+            if item is _END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
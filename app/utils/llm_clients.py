@@ -0,0 +1,131 @@
+"""
+Provider clients reused across generations.
+
+Building a provider client per call threw away its TLS and HTTP/gRPC
+connections every time, and `genai.configure` swapped the API key in global
+state shared by concurrent users. Clients are now built once per API key and
+kept in an LRU keyed by a hash of the key (keys are never stored in clear),
+each with its own connection pool. Clients idle for `llm_client_idle_seconds`
+are closed. `get` is called from the LLM thread pool, so the registry locks.
+"""
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+import httpx
+from google.ai import generativelanguage as glm
+import google.generativeai as genai
+from openai import DefaultHttpxClient, OpenAI
+from app.utils.settings import settings
+
+logger = logging.getLogger("uvicorn")
+
+
+class ClientRegistry:
+    def __init__(
+        self,
+        name: str,
+        factory: Callable[[str], object],
+        close: Callable[[object], None],
+        maxsize: int,
+        idle_seconds: float,
+    ):
+        self.name = name
+        self._factory = factory
+        self._close = close
+        self._maxsize = maxsize
+        self._idle_seconds = idle_seconds
+        # digest -> (client, last used), least recently used first
+        self._clients = OrderedDict()
+        # Clients evicted for room, closed once no generation can still be using them
+        self._retired = []
+        self._lock = threading.Lock()
+
+    def get(self, ai_key: str):
+        digest = hashlib.blake2b(ai_key.encode(), digest_size=16).hexdigest()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._clients.pop(digest, None)
+            client = entry[0] if entry else self._factory(ai_key)
+            self._clients[digest] = (client, now)
+            to_close = self._evict(now)
+        for stale in to_close:
+            self._close_quietly(stale)
+        return client
+
+    def _evict(self, now: float) -> list:
+        to_close = []
+        # Idle clients sit at the front; they are past any generation's timeout
+        while self._clients:
+            digest, (client, last_used) = next(iter(self._clients.items()))
+            if now - last_used < self._idle_seconds:
+                break
+            del self._clients[digest]
+            to_close.append(client)
+        while len(self._clients) > self._maxsize:
+            _, (client, _) = self._clients.popitem(last=False)
+            self._retired.append((now + settings.llm_timeout_seconds, client))
+        while self._retired and self._retired[0][0] <= now:
+            to_close.append(self._retired.pop(0)[1])
+        return to_close
+
+    def _close_quietly(self, client):
+        try:
+            self._close(client)
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to close {self.name} client: {e}")
+
+    def close(self):
+        with self._lock:
+            clients = [client for client, _ in self._clients.values()]
+            clients += [client for _, client in self._retired]
+            self._clients.clear()
+            self._retired.clear()
+        for client in clients:
+            self._close_quietly(client)
+
+
+def _openai_client(ai_key: str) -> OpenAI:
+    return OpenAI(
+        api_key=ai_key,
+        http_client=DefaultHttpxClient(
+            limits=httpx.Limits(
+                max_connections=settings.llm_concurrency,
+                max_keepalive_connections=settings.llm_concurrency,
+            )
+        ),
+    )
+
+
+def _gemini_model(ai_key: str) -> genai.GenerativeModel:
+    model = genai.GenerativeModel(settings.gemini_model)
+    # Bind the model to a client of its own instead of the global configured one.
+    # google-generativeai has no public per-model client: `_client` is private,
+    # which is why requirements.txt pins the SDK version. Revisit (or move to
+    # google.genai.Client, which takes the key per client) before upgrading.
+    model._client = glm.GenerativeServiceClient(client_options={"api_key": ai_key})
+    return model
+
+
+openai_clients = ClientRegistry(
+    "openai",
+    _openai_client,
+    lambda client: client.close(),
+    maxsize=settings.llm_client_cache_size,
+    idle_seconds=settings.llm_client_idle_seconds,
+)
+
+gemini_models = ClientRegistry(
+    "gemini",
+    _gemini_model,
+    lambda model: model._client.transport.close(),
+    maxsize=settings.llm_client_cache_size,
+    idle_seconds=settings.llm_client_idle_seconds,
+)
+
+
+def close_llm_clients():
+    openai_clients.close()
+    gemini_models.close()
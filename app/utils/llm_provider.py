@@ -0,0 +1,84 @@
+"""
+Interface every LLM provider implements, plus what they share: the content
+prompt and the JSON extraction of the answer.
+
+Providers are blocking (their SDKs are); app/utils/llm.py runs them on its
+thread pool and keeps the registry of providers by name.
+"""
+import json
+import re
+from abc import ABC, abstractmethod
+from typing import Iterator
+
+
+def build_content_prompt(
+    content_type="story",
+    content_about="a little boy",
+    content_size=300,
+    content_language="english",
+    content_theme="fantasy",
+) -> str:
+    return f"""
+    You are a creative writer.
+
+    Task: Write a {content_theme} {content_type} about {content_about}.
+    Language: {content_language}.
+
+    Requirements:
+    1. The content MUST be valid JSON with exactly three keys: "title", "content", and "tags".
+    2. "title": A creative title.
+    3. "content": The story text.
+    4. "tags": A list of tags related to the story.
+    5. Theme: {content_theme}.
+    6. STYLE: Use simple, easy-to-understand language suitable for a general audience. Avoid complex vocabulary.
+
+    LENGTH CONSTRAINT:
+    - Target word count: {content_size} words.
+    - MAXIMUM permitted words: {int(content_size) + 20}.
+    - STOP writing immediately if you are approaching this limit.
+    - Shorter is better than longer.
+
+    Output JSON ONLY. No markdown formatting.
+    """
+
+
+def extract_json_from_llm(text: str) -> dict:
+    """
+    Extracts JSON from markdown or plain text LLM output
+    """
+    if not text:
+        raise ValueError("Empty LLM response")
+
+    # Remove ```json and ``` fences if present
+    cleaned = re.sub(r"^```json\s*|```$", "", text.strip(), flags=re.MULTILINE)
+
+    return json.loads(cleaned)
+
+
+class LLMProvider(ABC):
+    # Value of the `model` request parameter selecting this provider
+    name: str
+
+    @abstractmethod
+    def generate(
+        self,
+        ai_key: str,
+        content_type,
+        content_about: str,
+        content_size: int,
+        content_language: str,
+        content_theme: str,
+    ) -> dict:
+        """Return the generated `{"title", "content", "tags"}`. Provider errors raise ValueError."""
+
+    @abstractmethod
+    def stream(
+        self,
+        ai_key: str,
+        content_type,
+        content_about: str,
+        content_size: int,
+        content_language: str,
+        content_theme: str,
+    ) -> Iterator[str]:
+        """Yield the raw text of the generation as it is produced."""
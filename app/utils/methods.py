@@ -1,3 +1,5 @@
+import base64
+import json
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 import re
@@ -11,6 +13,7 @@ from app.utils.enums.ResponseStatus import ResponseStatus
 from datetime import datetime, timezone
 import jwt
 import humanize
+from bson import json_util
 from app.utils.messages import OTP_SENT
 
 
@@ -64,6 +67,57 @@ def create_exception_response(status_code, message):
     )
 
 
+def sse_event(event: str, data) -> str:
+    """Format one server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def _get_field(doc: dict, field: str):
+    value = doc
+    for part in field.split("."):
+        value = (value or {}).get(part)
+    return value
+
+
+def encode_cursor(doc: dict, sort_field: str, id_field: str = "_id") -> str:
+    """Opaque keyset cursor pointing right after `doc` in a (sort_field, _id) DESC order"""
+    payload = json_util.dumps([_get_field(doc, sort_field), doc.get(id_field)])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        value, last_id = json_util.loads(base64.urlsafe_b64decode(padded))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    return value, last_id
+
+
+def build_keyset_query(cursor: str, sort_field: str, id_field: str = "_id") -> dict:
+    """Match every document that comes after the cursor in a (sort_field, _id) DESC order"""
+    value, last_id = decode_cursor(cursor)
+    return {
+        "$or": [
+            {sort_field: {"$lt": value}},
+            {sort_field: value, id_field: {"$lt": last_id}},
+        ]
+    }
+
+
+def apply_cursor(query: dict, cursor: str, sort_field: str, id_field: str = "_id") -> dict:
+    """Add the keyset condition of `cursor` to a find/$match query without clobbering its $or"""
+    keyset = build_keyset_query(cursor, sort_field, id_field)
+    return {**query, "$and": query.get("$and", []) + [keyset]}
+
+
+def build_next_cursor(docs: list, limit: int, sort_field: str, id_field: str = "_id"):
+    """Cursor for the page after `docs`, or None when this was the last page"""
+    if not docs or len(docs) < limit:
+        return None
+    return encode_cursor(docs[-1], sort_field, id_field)
+
+
 def token_expired_at(token: str):
     decoded = jwt.decode(token, options={"verify_signature": False})
     expiry_timestamp = decoded.get("exp")
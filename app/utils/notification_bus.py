@@ -0,0 +1,102 @@
+"""
+Delivers user-targeted notifications to whichever worker holds the user's sockets.
+
+Any worker publishes `(user_id, message)` events on the bus, a whole batch per
+message; every worker receives them and NotificationManager pushes each one to
+the sockets it holds for that user, if any.
+
+- LocalNotificationTransport  in-process only, enough for a single worker
+- PubSubNotificationTransport rides the pub/sub of a cache backend; with the
+                              cache daemon (CACHE_BACKEND=socket) it reaches every worker
+"""
+import logging
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, List, Tuple
+from app.config.cache.backend import CacheBackend
+from app.utils.cache_manager import cache_manager
+from app.utils.notification_manager import notification_manager
+from app.utils.settings import settings
+
+logger = logging.getLogger("uvicorn")
+
+NOTIFICATION_CHANNEL = "notifications"
+
+Deliver = Callable[[str, dict], Awaitable[None]]
+Events = List[Tuple[str, dict]]
+
+
+class NotificationTransport(ABC):
+    @abstractmethod
+    async def publish(self, events: Events):
+        """Hand every `(user_id, message)` event to every worker."""
+
+    @abstractmethod
+    async def subscribe(self, deliver: Deliver):
+        """Call `deliver(user_id, message)` for every published notification."""
+
+
+class LocalNotificationTransport(NotificationTransport):
+    def __init__(self):
+        self._deliver = None
+
+    async def publish(self, events: Events):
+        if self._deliver is not None:
+            for user_id, message in events:
+                await self._deliver(user_id, message)
+
+    async def subscribe(self, deliver: Deliver):
+        self._deliver = deliver
+
+
+class PubSubNotificationTransport(NotificationTransport):
+    def __init__(self, backend: CacheBackend):
+        self._backend = backend
+        self._deliver = None
+
+    async def publish(self, events: Events):
+        events = list(events)
+        if await self._backend.publish(NOTIFICATION_CHANNEL, events):
+            return
+        # Daemon unreachable: only the sockets held by this worker can still be served
+        logger.warning(
+            f"⚠️ Notification bus unreachable, {len(events)} notifications "
+            "delivered to this worker's sockets only"
+        )
+        if self._deliver is not None:
+            for user_id, message in events:
+                await self._deliver(user_id, message)
+
+    async def subscribe(self, deliver: Deliver):
+        self._deliver = deliver
+
+        async def _on_message(events):
+            for user_id, message in events:
+                await deliver(user_id, message)
+
+        await self._backend.subscribe(NOTIFICATION_CHANNEL, _on_message)
+
+
+def create_notification_transport(transport: str = None) -> NotificationTransport:
+    """Build the transport selected by `settings.notification_transport` ("pubsub" or "local")."""
+    transport = transport or settings.notification_transport
+    if transport == "pubsub":
+        return PubSubNotificationTransport(cache_manager.backend)
+    if transport != "local":
+        raise ValueError(f"Unknown notification transport: {transport}")
+    return LocalNotificationTransport()
+
+
+class NotificationBus:
+    def __init__(self, transport: NotificationTransport):
+        self.transport = transport
+
+    async def start(self):
+        """Deliver notifications published by any worker to this worker's sockets."""
+        await self.transport.subscribe(notification_manager.send_personal_notification)
+
+    async def publish(self, events: Events):
+        if events:
+            await self.transport.publish(events)
+
+
+notification_bus = NotificationBus(create_notification_transport())
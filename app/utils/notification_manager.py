@@ -1,38 +1,113 @@
+import asyncio
 import logging
 from typing import Dict, List
 from fastapi import WebSocket
+from app.utils.settings import settings
 
 logger = logging.getLogger("uvicorn")
 
+PING = {"type": "ping"}
+
+
+class _Connection:
+    """One WebSocket with its bounded outbound queue and the task draining it."""
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.queue = asyncio.Queue(maxsize=settings.ws_queue_size)
+        self.writer = None
+
+
 class NotificationManager:
     def __init__(self):
-        # Dictionary mapping user_id to a list of active WebSocket connections
-        self.active_connections: Dict[str, List[WebSocket]] = {}
+        # Dictionary mapping user_id to the active connections of each device
+        self.active_connections: Dict[str, List[_Connection]] = {}
+        # Close handshakes of dropped sockets still in flight
+        self._closing = set()
 
     async def connect(self, user_id: str, websocket: WebSocket):
         await websocket.accept()
-        if user_id not in self.active_connections:
-            self.active_connections[user_id] = []
-        self.active_connections[user_id].append(websocket)
+        connection = _Connection(websocket)
+        connection.writer = asyncio.create_task(self._write_loop(user_id, connection))
+        self.active_connections.setdefault(user_id, []).append(connection)
         logger.info(f"WebSocket connected for user: {user_id}. Active connections: {len(self.active_connections[user_id])}")
 
     def disconnect(self, user_id: str, websocket: WebSocket):
-        if user_id in self.active_connections:
-            if websocket in self.active_connections[user_id]:
-                self.active_connections[user_id].remove(websocket)
-                if not self.active_connections[user_id]:
-                    del self.active_connections[user_id]
+        connections = self.active_connections.get(user_id, [])
+        for connection in connections:
+            if connection.websocket is websocket:
+                self._remove(user_id, connection)
                 logger.info(f"WebSocket disconnected for user: {user_id}")
+                break
+
+    def _remove(self, user_id: str, connection: _Connection):
+        connections = self.active_connections.get(user_id, [])
+        if connection in connections:
+            connections.remove(connection)
+            if not connections:
+                del self.active_connections[user_id]
+        if connection.writer and connection.writer is not asyncio.current_task():
+            connection.writer.cancel()
+
+    async def _drop(
+        self, user_id: str, connection: _Connection, reason: str, code: int = 1011
+    ):
+        """Forget a dead or stalled socket and close it so the client reconnects."""
+        logger.warning(f"Dropping WebSocket of user {user_id}: {reason}")
+        self._remove(user_id, connection)
+        try:
+            await asyncio.wait_for(connection.websocket.close(code=code), 1)
+        except Exception:
+            pass
+
+    async def _write_loop(self, user_id: str, connection: _Connection):
+        send_timeout = settings.ws_send_timeout_ms / 1000
+        while True:
+            try:
+                message = await asyncio.wait_for(
+                    connection.queue.get(), settings.ws_heartbeat_seconds
+                )
+            except asyncio.TimeoutError:
+                # Idle: a ping keeps proxies from closing the socket and
+                # surfaces connections that died without a close frame
+                message = PING
+            try:
+                await asyncio.wait_for(connection.websocket.send_json(message), send_timeout)
+            except asyncio.TimeoutError:
+                await self._drop(user_id, connection, "send timed out")
+                return
+            except Exception as e:
+                await self._drop(user_id, connection, str(e) or type(e).__name__)
+                return
+
+    def send(self, user_id: str, websocket: WebSocket, message: dict):
+        """Queue `message` for one socket of `user_id`, e.g. a reply to its ping."""
+        for connection in self.active_connections.get(user_id, []):
+            if connection.websocket is websocket:
+                self._enqueue(user_id, connection, message)
+
+    def _enqueue(self, user_id: str, connection: _Connection, message: dict):
+        try:
+            connection.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # The client cannot keep up; it refetches notifications after reconnecting
+            self._remove(user_id, connection)
+            task = asyncio.create_task(
+                self._drop(user_id, connection, "outbound queue full")
+            )
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
 
     async def send_personal_notification(self, user_id: str, message: dict):
-        if user_id in self.active_connections:
-            connections = self.active_connections[user_id]
-            for connection in connections:
-                try:
-                    await connection.send_json(message)
-                except Exception as e:
-                    logger.error(f"Error sending WebSocket message to user {user_id}: {e}")
-                    # Optionally handle disconnection here if needed
+        # Only queued here: every device's writer delivers it in parallel
+        for connection in list(self.active_connections.get(user_id, [])):
+            self._enqueue(user_id, connection, message)
+
+    async def close(self):
+        for user_id, connections in list(self.active_connections.items()):
+            for connection in list(connections):
+                await self._drop(user_id, connection, "server shutting down", code=1001)
+
 
 # Global instance of the manager
 notification_manager = NotificationManager()
@@ -11,6 +11,44 @@ class Settings(BaseSettings):
     unsplash_url: str
     client_id: str
     gemini_model: str
+    # "local" keeps caches per worker, "socket" shares them through the cache daemon
+    cache_backend: str = "local"
+    cache_socket_path: str = "/tmp/inkly-cache.sock"
+    # Seconds hot user documents stay in the process cache, 0 disables it
+    user_cache_ttl: int = 0
+    # How often buffered post stat increments are written to Mongo
+    counter_flush_ms: int = 500
+    # Background jobs (notifications): queue bound, jobs handled per batch and
+    # how long a request waits for room in a full queue before the job is dropped
+    job_queue_size: int = 10000
+    job_batch_size: int = 100
+    job_enqueue_timeout_ms: int = 50
+    # Notification sockets: messages buffered per socket before a slow client is
+    # dropped, how long one send may take, and the idle ping interval
+    ws_queue_size: int = 100
+    ws_send_timeout_ms: int = 5000
+    ws_heartbeat_seconds: int = 25
+    # "pubsub" fans notifications out through the cache backend's pub/sub (every
+    # worker with CACHE_BACKEND=socket), "local" keeps them in this process
+    notification_transport: str = "pubsub"
+    # LLM generations: threads running provider calls, generations in flight per
+    # provider, and how long one may take including the wait for a slot
+    llm_threads: int = 16
+    llm_concurrency: int = 8
+    llm_timeout_seconds: int = 60
+    # Provider clients kept per API key, and how long an unused one stays open
+    # (keep it above llm_timeout_seconds)
+    llm_client_cache_size: int = 256
+    llm_client_idle_seconds: int = 600
+    # Generations pooled per normalized prompt for requests that opt in with
+    # `cached=true`, and how long a pool is kept; 0 variants disables the cache
+    generation_cache_variants: int = 3
+    generation_cache_ttl: int = 86400
+    # Local stub provider (`model=stub`) for load tests: first-token latency and
+    # token rate it simulates. Never enable it in production
+    llm_stub_enabled: bool = False
+    llm_stub_latency_ms: int = 500
+    llm_stub_tokens_per_second: int = 50
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,81 @@
+"""
+Deterministic local provider for load tests and development.
+
+It answers like a real provider, blocking the calling thread for a first-token
+latency and then emitting tokens at a fixed rate, without network access or
+API quota. The same parameters always produce the same generation. Selected
+with `model=stub` when `settings.llm_stub_enabled` is set.
+"""
+import hashlib
+import json
+import random
+import time
+from typing import Iterator, List
+from app.utils.llm_provider import LLMProvider
+
+_WORDS = (
+    "little boy girl forest river moon star dream light brave small quiet "
+    "happy old friend village road morning night wind garden secret smile "
+    "journey home sky bird tree song heart kind gentle bright"
+).split()
+
+# Roughly how many characters a provider emits per token
+_CHARS_PER_TOKEN = 4
+
+
+class StubProvider(LLMProvider):
+    name = "stub"
+
+    def __init__(self, latency_ms: int = 500, tokens_per_second: int = 50):
+        self.latency = latency_ms / 1000
+        self.token_interval = 1 / tokens_per_second if tokens_per_second > 0 else 0
+
+    def _document(
+        self, content_type, content_about, content_size, content_language, content_theme
+    ) -> dict:
+        params = [str(getattr(content_type, "value", content_type)), content_about,
+                  int(content_size), content_language, content_theme]
+        seed = hashlib.blake2b(json.dumps(params).encode(), digest_size=8).digest()
+        rng = random.Random(seed)
+        words = [rng.choice(_WORDS) for _ in range(int(content_size))]
+        return {
+            "title": " ".join(rng.choice(_WORDS) for _ in range(3)).title(),
+            "content": " ".join(words).capitalize() + ".",
+            "tags": sorted({rng.choice(_WORDS) for _ in range(3)}),
+        }
+
+    def _tokens(self, text: str) -> List[str]:
+        return [text[i : i + _CHARS_PER_TOKEN] for i in range(0, len(text), _CHARS_PER_TOKEN)]
+
+    def generate(
+        self,
+        ai_key: str,
+        content_type="story",
+        content_about="a little boy",
+        content_size=300,
+        content_language="english",
+        content_theme="fantasy",
+    ) -> dict:
+        document = self._document(
+            content_type, content_about, content_size, content_language, content_theme
+        )
+        tokens = len(self._tokens(json.dumps(document)))
+        time.sleep(self.latency + tokens * self.token_interval)
+        return document
+
+    def stream(
+        self,
+        ai_key: str,
+        content_type="story",
+        content_about="a little boy",
+        content_size=300,
+        content_language="english",
+        content_theme="fantasy",
+    ) -> Iterator[str]:
+        document = self._document(
+            content_type, content_about, content_size, content_language, content_theme
+        )
+        time.sleep(self.latency)
+        for token in self._tokens(json.dumps(document)):
+            time.sleep(self.token_interval)
+            yield token
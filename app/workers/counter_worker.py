@@ -0,0 +1,17 @@
+import asyncio
+import logging
+
+from app.services.counter_service import flush_stats
+from app.utils.settings import settings
+
+logger = logging.getLogger("uvicorn")
+
+
+async def counter_worker():
+    interval = settings.counter_flush_ms / 1000
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await flush_stats()
+        except Exception as e:
+            logger.error(f"❌ Counter flush failed: {e}")
@@ -0,0 +1,7 @@
+from app.queue.jobs import job_queue
+
+
+async def job_worker():
+    while True:
+        batches = await job_queue.next_batch()
+        await job_queue.process(batches)
@@ -0,0 +1,179 @@
+"""
+Load test for content generation against the local stub provider.
+
+Fires `--requests` generations, `--concurrency` at a time, and reports
+throughput, latency percentiles and how long the event loop was blocked
+(measured by a probe that wakes up every 10ms).
+
+In-process, through app/utils/llm.py:
+
+    python -m benchmarks.generate_benchmark --mode pool
+    python -m benchmarks.generate_benchmark --mode inline    # provider called on the loop
+    python -m benchmarks.generate_benchmark --mode stream    # adds time to first content
+
+Against a running server started with LLM_STUB_ENABLED=true (the loop probe
+is then the latency of /api/health while the generations run):
+
+    python -m benchmarks.generate_benchmark --url http://localhost:8000 --token <jwt>
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+PROBE_INTERVAL = 0.01
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)]
+
+
+def _report(name, latencies, elapsed, lags, first_bytes=None, errors=0):
+    ms = lambda seconds: f"{seconds * 1000:8.1f}ms"
+    print(f"\n== {name}")
+    print(f"requests      {len(latencies)} ok, {errors} failed in {elapsed:.2f}s")
+    print(f"throughput    {len(latencies) / elapsed:8.1f} req/s")
+    print(
+        f"latency       p50 {ms(_percentile(latencies, 50))}  p95 {ms(_percentile(latencies, 95))}"
+        f"  p99 {ms(_percentile(latencies, 99))}"
+    )
+    if first_bytes:
+        print(f"first content p50 {ms(_percentile(first_bytes, 50))}  p95 {ms(_percentile(first_bytes, 95))}")
+    print(
+        f"loop blocked  max {ms(max(lags, default=0))}  p99 {ms(_percentile(lags, 99))}"
+        f"  mean {ms(statistics.fmean(lags) if lags else 0)}"
+    )
+
+
+async def _probe_loop(lags, stop):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        started = loop.time()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(max(loop.time() - started - PROBE_INTERVAL, 0))
+
+
+async def _run(requests, concurrency, one_request, probe):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, first_bytes, lags = [], [], []
+    errors = 0
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(lags, stop))
+
+    async def worker(i):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                first = await one_request(i)
+            except Exception as e:
+                errors += 1
+                print(f"request {i} failed: {e}")
+                return
+            latencies.append(time.perf_counter() - started)
+            if first is not None:
+                first_bytes.append(first - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe_task
+    return latencies, elapsed, lags, first_bytes, errors
+
+
+async def run_in_process(args):
+    from app.utils import llm
+    from app.utils.json_stream import GenerationStreamParser
+    from app.utils.stub_llm import StubProvider
+
+    provider = StubProvider(args.latency_ms, args.tokens_per_second)
+    llm.register_provider(provider)
+    # Distinct prompts so no two requests are identical
+    params = lambda i: ("story", f"benchmark {i}", args.size, "english", "fantasy")
+
+    async def pooled(i):
+        await llm.generate_content("stub", "key", *params(i))
+
+    async def inline(i):
+        # What /v1/generate did before: the blocking call on the event loop
+        provider.generate("key", *params(i))
+
+    async def streamed(i):
+        parser, first = GenerationStreamParser(), None
+        async for chunk in llm.stream_content("stub", "key", *params(i)):
+            if first is None and any(event == "content" for event, _ in parser.feed(chunk)):
+                first = time.perf_counter()
+        return first
+
+    one_request = {"pool": pooled, "inline": inline, "stream": streamed}[args.mode]
+    return await _run(args.requests, args.concurrency, one_request, _probe_loop)
+
+
+async def run_over_http(args):
+    import httpx
+
+    headers = {"Authorization": f"Bearer {args.token}"}
+    async with httpx.AsyncClient(base_url=args.url, headers=headers, timeout=None) as client:
+
+        async def one_request(i):
+            response = await client.get(
+                "/api/content/v1/generate",
+                params={
+                    "ai_key": "stub",
+                    "type": "story",
+                    "prompt": f"benchmark {i}",
+                    "size": args.size,
+                    "model": "stub",
+                },
+            )
+            body = response.json()
+            if body.get("status_code") != 200:
+                raise RuntimeError(body.get("message"))
+
+        async def probe_health(lags, stop):
+            while not stop.is_set():
+                started = time.perf_counter()
+                await client.get("/api/health")
+                lags.append(time.perf_counter() - started)
+                await asyncio.sleep(PROBE_INTERVAL)
+
+        return await _run(args.requests, args.concurrency, one_request, probe_health)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["pool", "inline", "stream"], default="pool")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--size", type=int, default=300, help="words per generation")
+    parser.add_argument("--latency-ms", type=int, default=500)
+    parser.add_argument("--tokens-per-second", type=int, default=200)
+    parser.add_argument("--threads", type=int, help="LLM thread pool size (LLM_THREADS)")
+    parser.add_argument("--provider-limit", type=int, help="generations per provider (LLM_CONCURRENCY)")
+    parser.add_argument("--url", help="benchmark a running server instead of the in-process path")
+    parser.add_argument("--token", help="bearer token for --url")
+    args = parser.parse_args()
+
+    # Read by app.utils.settings, which is imported lazily below
+    if args.threads:
+        os.environ["LLM_THREADS"] = str(args.threads)
+    if args.provider_limit:
+        os.environ["LLM_CONCURRENCY"] = str(args.provider_limit)
+
+    if args.url:
+        name = f"http {args.url}"
+        results = asyncio.run(run_over_http(args))
+    else:
+        name = f"in-process {args.mode}"
+        results = asyncio.run(run_in_process(args))
+    latencies, elapsed, lags, first_bytes, errors = results
+    _report(name, latencies, elapsed, lags, first_bytes, errors)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,15 +12,18 @@ from app.routes.content_routes import content_router
 from app.routes.social_routes import social_router
 
 from app.workers.otp_worker import otp_worker
+from app.workers.counter_worker import counter_worker
+from app.workers.job_worker import job_worker
+from app.queue.jobs import job_queue
+from app.services.counter_service import flush_stats
+from app.utils.cache_manager import cache_manager
+from app.utils.notification_manager import notification_manager
+from app.utils.notification_bus import notification_bus
+from app.utils.llm_clients import close_llm_clients
+from app.config.auth.token import start_token_revocation_sync
 from app.utils.constants import INTERESTS_DATA, CONTENT_CONFIGS_DATA
+from app.config.database.indexes import INDEXES, ensure_indexes, find_collection_scans
 from app.config.database.mongo import (
-    create_device_id_index,
-    create_post_bookmark_index,
-    create_post_heart_index,
-    create_post_view_index,
-    create_user_id_index,
-    create_user_email_index,
-    create_user_device_id_index,
     interests_collection,
     content_configs_collection, 
 )
@@ -73,29 +76,44 @@ async def startup_event():
         print(f"❌ Failed to sync interests: {e}")
 
     asyncio.create_task(otp_worker())
+    asyncio.create_task(counter_worker())
+    asyncio.create_task(job_worker())
+
+    # Follow cache invalidations broadcast by the other workers
+    await cache_manager.start()
+    # Push notifications published by any worker to the sockets held here
+    await notification_bus.start()
+    try:
+        await start_token_revocation_sync()
+    except Exception as e:
+        print(f"❌ Failed to load revoked tokens: {e}")
+    print(f"✅ Cache backend: {settings.cache_backend}")
 
     # Create DB indexes
     print("🏗️ Building database indexes...")
-    index_tasks = [
-        ("Device ID", create_device_id_index),
-        ("User ID", create_user_id_index),
-        ("User Email", create_user_email_index),
-        ("User Device ID", create_user_device_id_index),
-        ("Post View", create_post_view_index),
-        ("Post Heart", create_post_heart_index),
-        ("Post Bookmark", create_post_bookmark_index),
-    ]
-
-    for name, func in index_tasks:
+    failures = await ensure_indexes()
+    print(f"   ✅ {len(INDEXES) - failures}/{len(INDEXES)} indexes created/verified")
+    if settings.debug:
         try:
-            await func()
-            print(f"   ✅ {name} index created/verified")
+            scans = await find_collection_scans()
+            if scans:
+                print(f"   ⚠️ {len(scans)} query shapes still use a collection scan")
         except Exception as e:
-            print(f"   ⚠️ Failed to create {name} index: {e}")
+            print(f"   ⚠️ Failed to explain query shapes: {e}")
     
     print("🚀 Startup process complete")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Write the post stats and notifications still buffered in this worker
+    await job_queue.drain(timeout=5)
+    await flush_stats()
+    await notification_manager.close()
+    close_llm_clients()
+    await cache_manager.backend.close()
+
+
 # ---------------- Static Files ---------------- #
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -109,3 +127,8 @@ def serve_index():
 @app.get("/api/health", include_in_schema=False)
 def check_health():
     return {"health": "ok", "message": "Server is up and running"}
+
+
+@app.get("/api/health/jobs", include_in_schema=False)
+def check_jobs():
+    return job_queue.stats()